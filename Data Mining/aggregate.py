@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+def iter_csv_chunks(path, chunksize=100000, usecols=None):
+    # Baca CSV per chunk, memori tetap konstan berapapun jumlah barisnya
+    yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
+class GroupedMoments:
+    """Agregat parsial per grup (count, sum) yang bisa di-merge.
+
+    Cukup untuk menghitung mean per grup secara exact tanpa menyimpan baris mentah.
+    """
+
+    def __init__(self, by, columns):
+        self.by = by
+        self.columns = list(columns)
+        # None sampai chunk pertama masuk
+        self.count = None
+        self.sum = None
+
+    def update(self, chunk):
+        # Cast ke float64 dulu supaya sum dari kolom int16/int8 tidak overflow
+        values = chunk[self.columns].astype(np.float64)
+        keys = [chunk[column].astype(str) for column in self._by_list()]
+
+        partial = GroupedMoments(self.by, self.columns)
+        partial.count = values.groupby(keys).size().astype(np.float64)
+        partial.sum = values.groupby(keys).sum()
+        self.merge(partial)
+        return self
+
+    def merge(self, other):
+        if other.count is None:
+            return self
+        if self.count is None:
+            self.count, self.sum = other.count, other.sum
+            return self
+        self.count = self.count.add(other.count, fill_value=0)
+        self.sum = self.sum.add(other.sum, fill_value=0)
+        return self
+
+    def _by_list(self):
+        return self.by if isinstance(self.by, list) else [self.by]
+
+    def _named(self, frame):
+        frame = frame.copy()
+        frame.index.names = self._by_list()
+        return frame
+
+    def mean(self):
+        return self._named(self.sum.div(self.count, axis=0))
+
+
+class ValueCounts:
+    """value_counts yang bisa di-merge antar chunk."""
+
+    def __init__(self, column):
+        self.column = column
+        self.counts = None
+
+    def update(self, chunk):
+        counts = chunk[self.column].astype(str).value_counts()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+        return self
+
+    def result(self):
+        counts = self.counts.astype(np.int64).sort_values(ascending=False, kind='stable')
+        counts.index.name = self.column
+        counts.name = 'count'
+        return counts
+
+
+class GroupedValueCounts:
+    """Jumlah kemunculan tiap nilai `column` per grup, bisa di-merge antar chunk.
+
+    Memori sebanding dengan jumlah nilai unik (Screen On Time cuma 1 angka desimal), bukan jumlah baris,
+    dan cukup untuk kuartil / whisker / flier boxplot yang exact.
+    """
+
+    def __init__(self, by, column):
+        self.by = by
+        self.column = column
+        self.counts = None
+
+    def update(self, chunk):
+        counts = chunk.groupby([self.by, self.column]).size()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+        return self
+
+    def groups(self):
+        # {grup: (nilai terurut, jumlah)}, grup terurut seperti groupby
+        counts = self.counts.astype(np.int64).sort_index()
+        return {key: (group.index.get_level_values(1).to_numpy(dtype=np.float64), group.to_numpy())
+                for key, group in counts.groupby(level=0)}
+
+
+def stream_aggregate(chunks, aggregators):
+    # Satu kali jalan atas semua chunk, semua aggregator di-update bersamaan
+    for chunk in chunks:
+        for aggregator in aggregators.values():
+            aggregator.update(chunk)
+    return aggregators
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+ANOMALY_FEATURES = [
+    "App Usage Time (min/day)",
+    "Screen On Time (hours/day)",
+    "Battery Drain (mAh/day)",
+    "Number of Apps Installed",
+    "Data Usage (MB/day)",
+]
+
+
+def fit_anomaly_model(X, contamination=0.05, random_state=42):
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    # X: array (n_rows, len(ANOMALY_FEATURES))
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    iso_forest = IsolationForest(contamination=contamination, random_state=random_state)
+    iso_forest.fit(X_scaled)
+
+    # Baseline mean/std (ddof=1, sama seperti pandas) buat penjelasan z-score
+    return {
+        'model': iso_forest,
+        'scaler': scaler,
+        'features': list(ANOMALY_FEATURES),
+        'n': len(X),
+        'mean': X.mean(axis=0),
+        'std': X.std(axis=0, ddof=1),
+    }
+
+
+def score_anomalies(artifact, X):
+    # Return (label -1/1, skor); skor < 0 berarti anomali
+    X_scaled = artifact['scaler'].transform(X)
+    scores = artifact['model'].decision_function(X_scaled)
+    labels = np.where(scores < 0, -1, 1)
+    return labels, scores
+
+
+def pack_anomaly_model(artifact):
+    """IsolationForest + StandardScaler hasil fit_anomaly_model -> array numpy (lihat trees.pack_isolation_forest)."""
+    from trees import pack_isolation_forest
+
+    packed = pack_isolation_forest(artifact['model'])
+    packed['scaler_mean'] = np.asarray(artifact['scaler'].mean_, dtype=np.float64)
+    packed['scaler_scale'] = np.asarray(artifact['scaler'].scale_, dtype=np.float64)
+    return packed
+
+
+def score_packed_anomalies(packed, X):
+    # Sama dengan score_anomalies, tapi dari forest yang sudah di-pack (tanpa sklearn)
+    from trees import decision_isolation_forest
+
+    X_scaled = (np.asarray(X, dtype=np.float64) - packed['scaler_mean']) / packed['scaler_scale']
+    scores = decision_isolation_forest(packed, X_scaled)
+    labels = np.where(scores < 0, -1, 1)
+    return labels, scores
+
+
+def explain_anomalies(X, mean, std, features, threshold=2):
+    # Z-score semua baris sekaligus, lalu gabung nama fitur yang deviasinya > threshold
+    deviations = (X - mean) / std
+    high_deviation = np.abs(deviations) > threshold
+
+    reasons = np.full(len(X), '', dtype=object)
+    for j, feature in enumerate(features):
+        part = np.char.add(np.char.add(f"{feature} (", np.char.mod('%.2f', X[:, j])), ')').astype(object)
+        part = np.where(high_deviation[:, j], part, '')
+        joined = np.where(reasons == '', part, reasons + ', ' + part)
+        reasons = np.where(part == '', reasons, joined)
+
+    return ('Anomali karena: ' + reasons).astype(object)
@@ -1,28 +1,288 @@
-import numpy as np
-from flask import Flask, request, jsonify, render_template
-import pandas as pd
-from pyexpat import model
-from sklearn.cluster import KMeans
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, LabelEncoder
-from sklearn.metrics import silhouette_score, classification_report, confusion_matrix
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-import seaborn as sns
+import copy
 import io
-import base64
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-import joblib
-from sklearn.ensemble import IsolationForest
-from mlxtend.frequent_patterns import fpgrowth, apriori
-from mlxtend.frequent_patterns import association_rules
-import networkx as nx
+import os
+import threading
+import time
+from contextlib import contextmanager
 
-
-app = Flask(__name__)
-df = pd.read_csv('user_behavior_dataset.csv')
+import click
+import numpy as np
+from flask import (Blueprint, Flask, before_render_template, current_app, g, request, jsonify, render_template,
+                   template_rendered, url_for)
+import pandas as pd
+from cache import ResultCache, make_key
+from dataset import DatasetStore
+from httpcache import (available_encodings, compress_page, negotiate_encoding, page_body, page_etag,
+                       template_version)
+from registry import ModelNotFound, ModelRegistry, new_version
+from rules import SORT_KEYS
+from charts import (bar_spec, box_spec_counts, graph_spec, heatmap_spec, hue_scatter_spec, line_spec,
+                    render_charts, scatter_spec)
+from aggregate import GroupedMoments, GroupedValueCounts, ValueCounts, iter_csv_chunks, stream_aggregate
+from anomaly import (ANOMALY_FEATURES, explain_anomalies, fit_anomaly_model, pack_anomaly_model, score_anomalies,
+                     score_packed_anomalies)
+from batching import MicroBatcher
+from jobs import JobQueue, report_progress
+from metrics import (finish_request_spans, peak_rss_bytes, record_stage, registry as metrics_registry, server_timing,
+                     span, start_profile, start_request_spans, stop_profile)
+from trees import load_forest, pack_forest, predict_forest, save_packed
+
+# sklearn, mlxtend, matplotlib, seaborn & networkx di-import di dalam fungsi yang memakainya,
+# jadi import app (server start / test) tidak menunggu library berat yang belum tentu dipakai
+
+
+DATASET_PATH = 'user_behavior_dataset.csv'
+# flock untuk CSV dataset: ingest (append) eksklusif, pembaca CSV shared
+INGEST_LOCK_PATH = os.environ.get('INGEST_LOCK_PATH', '.cache/ingest.lock')
+
+# Semua route ada di blueprint, app-nya dibuat di create_app()
+bp = Blueprint('main', __name__, cli_group=None)
+# Dataset di-parse sekali (kolom kategori + dtype numerik kecil), tiap route dapat view read-only
+dataset = DatasetStore(DATASET_PATH, lock_path=INGEST_LOCK_PATH)
+
+# Cache hasil analisis (key = hash dataset + parameter), backing store di disk
+result_cache = ResultCache()
+
+# Analisis berat (/cluster, /classification, /association) jalan di background, request cuma dapat job id
+job_queue = JobQueue()
+
+# optimal_clusters=None -> dicari otomatis dari knee kurva SSE
+CLUSTER_PARAMS = {'max_clusters': 10, 'optimal_clusters': None, 'random_state': 42,
+                  'k_search_mode': 'auto', 'early_stop_tol': 0.01,
+                  'quality_mode': 'auto', 'silhouette_sample_size': 5000}
+CLASSIFICATION_PARAMS = {'test_size': 0.2, 'random_state': 42, 'high_usage_threshold': 1000}
+# mine_once=True: itemset di-mining sekali, rules dipakai untuk view FP-Growth dan Apriori
+ASSOCIATION_PARAMS = {'min_support': 0.05, 'min_confidence': 0.5, 'chunksize': 100000, 'mine_once': True}
+
+
+def cached_result(name, params, compute):
+    dataset.view()  # pastikan versi dataset up to date
+    key = make_key(name, dataset.version, params)
+
+    def timed_compute():
+        with span(f'compute.{name}'):
+            return compute(**params)
+    return result_cache.get_or_compute(key, timed_compute)
+
+
+def peek_result(name, params):
+    # Ambil dari cache tanpa menghitung, None kalau belum ada
+    dataset.view()
+    return result_cache.get(make_key(name, dataset.version, params))
+
+
+def cached_or_job(name, params, compute):
+    """Return (hasil, None) kalau sudah ada di cache, kalau belum (None, job) yang menghitungnya di background."""
+    value = peek_result(name, params)
+    if value is not None:
+        return value, None
+    job = job_queue.submit(make_key(name, dataset.version, params),
+                           lambda: cached_result(name, params, compute), label=name)
+    return None, job
+
+
+def without_model(name, params, compute_data):
+    """Bungkus compute_*_data: model hasil fit ('model') disimpan di key cache terpisah ({name}-model).
+
+    Data halaman yang di-cache jadi bebas objek sklearn, jadi render dari cache tidak perlu import sklearn.
+    """
+    def compute(**kwargs):
+        data = dict(compute_data(**kwargs))
+        model = data.pop('model', None)
+        if model is not None:
+            result_cache.set(make_key(f'{name}-model', dataset.version, params), model)
+        return data
+    return compute
+
+
+def fitted_model(name, params, compute_data):
+    # Model dari analisis halaman; kalau sudah ter-evict dari cache, analisisnya dihitung ulang
+    model = peek_result(f'{name}-model', params)
+    if model is None:
+        result_cache.set(make_key(f'{name}-data', dataset.version, params),
+                         without_model(name, params, compute_data)(**params))
+        model = peek_result(f'{name}-model', params)
+    return model
+
+
+def chart_mode():
+    # Default chart dirender di browser dari /api/charts/<route>; ?charts=png untuk PNG dari server
+    return 'png' if request.args.get('charts') == 'png' else 'client'
+
+
+def page_result(name, params, compute_data, mode):
+    data = cached_result(f'{name}-data', params, without_model(name, params, compute_data))
+    pngs = None
+    if mode == 'png':
+        # Fallback: spec chart yang sama di-render jadi PNG di server, hasilnya di-cache
+        report_progress(0.9, 'Render chart')
+        pngs = cached_result(f'{name}-png', params, lambda **_: render_charts(data['charts']))
+    return assemble_page(data, pngs, mode)
+
+
+def ready_page_result(name, params, mode):
+    data = peek_result(f'{name}-data', params)
+    pngs = peek_result(f'{name}-png', params) if mode == 'png' else None
+    if data is None or (mode == 'png' and pngs is None):
+        return None
+    return assemble_page(data, pngs, mode)
+
+
+def assemble_page(data, pngs, mode):
+    result = {key: value for key, value in data.items() if key != 'charts'}
+    result['chart_mode'] = mode
+    if pngs is not None:
+        result.update(pngs)
+    return result
+
+
+def render_page(name, params, compute_data, template, **context):
+    """Render halaman kalau hasilnya sudah di cache; kalau belum, analisis dikirim ke job queue dan
+    yang dikirim halaman progress yang mem-poll /api/jobs/<id> lalu reload setelah selesai."""
+    mode = chart_mode()
+    dataset.view()  # pastikan versi dataset up to date sebelum ETag dihitung
+
+    # HTML yang sudah dirender disimpan terkompresi per versi dataset + parameter + template, ETag
+    # diturunkan dari key yang sama: conditional GET langsung 304 tanpa lookup / render ulang.
+    # Encoding yang tersedia ikut di key: HTML yang disimpan sebelum brotli ter-install tidak punya body 'br'
+    html_params = {'params': params, 'mode': mode, 'template': template, 'context': context,
+                   'templates': current_app.config['TEMPLATE_VERSION'], 'encodings': available_encodings()}
+    html_key = make_key(f'{name}-html', dataset.version, html_params)
+    encoding = negotiate_encoding(request.accept_encodings)
+    etag = page_etag(html_key, encoding)
+    if request.if_none_match.contains_weak(etag):
+        return cached_page_response(None, encoding, etag, status=304)
+
+    stored = result_cache.get(html_key)
+    if stored is None:
+        result = ready_page_result(name, params, mode)
+        if result is not None:
+            stored = compress_page(render_template(template, **context, **result))
+            result_cache.set(html_key, stored)
+    if stored is not None:
+        # Pilih ulang dari encoding yang benar-benar ada di body tersimpan
+        stored_encoding = negotiate_encoding(request.accept_encodings, stored)
+        if stored_encoding != encoding:
+            encoding, etag = stored_encoding, page_etag(html_key, stored_encoding)
+        return cached_page_response(stored, encoding, etag)
+
+    key = make_key(f'{name}-page', dataset.version, {'params': params, 'mode': mode})
+    job = job_queue.submit(key, lambda: page_result(name, params, compute_data, mode), label=name)
+    # Location sama seperti job_accepted, jadi client non-browser (mis. loadtest) bisa poll status job-nya
+    return (render_template('job.html', job=job.snapshot(), **context), 202,
+            {'Location': url_for('main.api_job', job_id=job.id), 'Retry-After': '1'})
+
+
+def cached_page_response(stored, encoding, etag, status=200):
+    body = page_body(stored, encoding) if stored is not None else b''
+    response = current_app.response_class(body, status=status, mimetype='text/html')
+    if encoding and status == 200:
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    # Browser selalu revalidasi (dapat 304 kalau dataset & parameter belum berubah)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# Model yang sudah di-training disimpan di memori, reload otomatis kalau artefaknya berubah
+model_registry = ModelRegistry()
+model_registry.register('battery', 'model.pkl')
+# Baseline mean/std untuk penjelasan z-score (di-update lewat /api/ingest)
+model_registry.register('anomaly', 'anomaly_model.pkl')
+# IsolationForest + StandardScaler yang sudah di-pack (.npz, memory-map), dipakai untuk skor anomali
+model_registry.register('anomaly_forest', 'anomaly_forest.npz', loader=lambda path: load_forest(path))
+# Scaler 1-10 + MiniBatchKMeans, di-update incremental lewat /api/ingest
+model_registry.register('cluster', 'cluster_model.pkl')
+# Forest prediksi baterai yang sudah di-pack jadi array (.npz, memory-map) untuk prediksi latency rendah
+model_registry.register('forest', 'model_forest.npz', loader=lambda path: load_forest(path))
+# Decision tree High Data Usage + tabel node hasil compile (trees.py)
+model_registry.register('classifier', 'classifier_model.pkl')
+
+BATTERY_FEATURES = ['App Usage Time (min/day)', 'Screen On Time (hours/day)',
+                    'Battery Drain (mAh/day)', 'Data Usage (MB/day)',
+                    'Number of Apps Installed', 'Age']
+
+# Kolom yang dinormalisasi 1-10 untuk clustering
+CLUSTER_FEATURES = ['App Usage Time (min/day)', 'Screen On Time (hours/day)',
+                    'Battery Drain (mAh/day)', 'Data Usage (MB/day)',
+                    'Number of Apps Installed', 'Age']
+
+# Nama field form/API -> nama kolom di dataset
+FIELD_ALIASES = {
+    'app_usage_time': 'App Usage Time (min/day)',
+    'screen_on_time': 'Screen On Time (hours/day)',
+    'battery_drain': 'Battery Drain (mAh/day)',
+    'data_usage': 'Data Usage (MB/day)',
+    'num_apps_installed': 'Number of Apps Installed',
+    'age': 'Age',
+    'device_model': 'Device Model',
+    'operating_system': 'Operating System',
+    'gender': 'Gender',
+    'user_id': 'User ID',
+    'user_behavior_class': 'User Behavior Class',
+}
+
+
+def read_batch():
+    # Batch bisa dikirim sebagai CSV (body / upload file) atau JSON (list of records / {"rows": [...]})
+    if request.mimetype in ('text/csv', 'application/csv'):
+        frame = pd.read_csv(io.StringIO(request.get_data(as_text=True)))
+    elif 'file' in request.files:
+        frame = pd.read_csv(request.files['file'])
+    else:
+        payload = request.get_json(force=True)
+        records = payload.get('rows', []) if isinstance(payload, dict) else payload
+        frame = pd.DataFrame.from_records(records)
+    return frame.rename(columns=FIELD_ALIASES)
+
+
+def batch_matrix(frame, features, defaults=None):
+    frame = frame.copy()
+    for column, value in (defaults or {}).items():
+        if column not in frame.columns:
+            frame[column] = value
+    missing = [column for column in features if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Kolom tidak ada: {', '.join(missing)}")
+    # Semua endpoint batch (predict, anomaly, cluster, classify) menolak nilai kosong / tidak hingga
+    return require_finite(frame[features].to_numpy(dtype=np.float64), features)
+
+
+def require_finite(X, features):
+    # Sel kosong / null jadi NaN dan 'inf' lolos float(), keduanya ditolak sebelum masuk model
+    invalid = ~np.isfinite(X).all(axis=0)
+    if invalid.any():
+        raise ValueError(f"Nilai kosong atau tidak hingga di kolom: "
+                         f"{', '.join(feature for feature, bad in zip(features, invalid) if bad)}")
+    return X
+
+
+# Sampai jumlah baris ini prediksi pakai forest hasil pack, batch lebih besar pakai sklearn (hasil identik).
+# Walk per level ~3x lebih lambat dari sklearn untuk batch ribuan baris, jadi model.pkl (node tree
+# di-copy per proses) cuma di-load worker yang memang menerima batch besar.
+PACKED_MAX_ROWS = 256
+
+
+def predict_battery_drain(X):
+    # X: array (n_rows, len(BATTERY_FEATURES)), di-scale dulu pakai scaler dari training
+    with span('battery_predict'):
+        if len(X) <= PACKED_MAX_ROWS:
+            try:
+                packed = model_registry.get('forest')
+            except (ModelNotFound, ValueError):
+                # Belum di-export / format .npz lama: tetap bisa prediksi lewat sklearn
+                packed = None
+            # Forest hasil export dari model.pkl versi lain (training baru, export belum jalan) -> pakai sklearn
+            if packed is not None and packed['version'] == model_registry.version('battery'):
+                # Sama dengan MinMaxScaler.transform (X * scale_ + min_), tanpa validasi per panggilan
+                return predict_forest(packed, X * packed['scale'] + packed['min'])
+        artifact = model_registry.get('battery')
+        return artifact['model'].predict(artifact['scaler'].transform(X))
+
+
+# Request prediksi kecil yang datang bersamaan digabung jadi satu panggilan predict_battery_drain
+# (BATCH_MAX_SIZE baris / BATCH_MAX_WAIT_MS, lihat batching.py)
+battery_batcher = MicroBatcher(predict_battery_drain, name='battery-batcher')
 
 # Data Preprocessing for Association Route
 def preprocess_data(data):
@@ -35,13 +295,16 @@ def preprocess_data(data):
 
 # Preprocessing data and training model
 def train_model():
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import MinMaxScaler
+
     # Select relevant columns
-    columns_to_use = ['App Usage Time (min/day)', 'Screen On Time (hours/day)',
-                      'Battery Drain (mAh/day)', 'Data Usage (MB/day)',
-                      'Number of Apps Installed', 'Age']  # You can change or add more columns as needed
+    columns_to_use = BATTERY_FEATURES  # You can change or add more columns as needed
 
     # Features (X) and target (y)
-    X = df[columns_to_use]
+    df = dataset.view()
+    X = df[columns_to_use].to_numpy(dtype=np.float64)
     y = df['Battery Drain (mAh/day)']  # Assuming we're predicting battery drain
 
     # Splitting the dataset into training and testing sets
@@ -56,174 +319,290 @@ def train_model():
     model = RandomForestRegressor(n_estimators=100, random_state=42)
     model.fit(X_train_scaled, y_train)
 
-    # Save the trained model to a file
-    joblib.dump(model, 'model.pkl')
-    print("Model has been saved as 'model.pkl'")
-
-# Train the model when the app starts
-train_model()
-
-@app.route('/layout')
+    # Save the trained model + scaler to a file
+    artifact = model_registry.save('battery', {
+        'model': model,
+        'scaler': scaler,
+        'features': columns_to_use,
+        'dataset_hash': dataset.version,
+    })
+    print(f"Model has been saved as 'model.pkl' (version {artifact['version']})")
+    export_forest()
+
+
+def verify_packed(name, X, expected, packed, single_step=1):
+    """Cek model yang di-pack identik dengan sklearn sebelum di-export, per batch dan per baris.
+
+    Dicek di data training + titik acak di sekitar range-nya + baris dengan NaN (arah missing value
+    di tiap split harus sama); single_step > 1 cuma mengecek tiap baris ke-n untuk jalur 1 baris.
+    """
+    low, high = X.min(axis=0), X.max(axis=0)
+    rng = np.random.default_rng(0)
+    X = np.vstack([X, rng.uniform(low - (high - low) * 0.1, high + (high - low) * 0.1, size=(1000, X.shape[1]))])
+    missing = X[rng.choice(len(X), 200, replace=False)]
+    missing[np.arange(len(missing)), rng.integers(0, X.shape[1], len(missing))] = np.nan
+    X = np.vstack([X, missing])
+
+    result = expected(X)
+    single = np.concatenate([packed(X[i:i + 1]) for i in range(0, len(X), single_step)])
+    if not (np.array_equal(packed(X), result) and np.array_equal(single, result[::single_step])):
+        raise RuntimeError(f"Hasil {name} yang di-pack tidak identik dengan sklearn, export dibatalkan")
+
+
+def export_forest():
+    """Pack RandomForest di model.pkl jadi model_forest.npz; hasil prediksi dicek identik dengan sklearn dulu."""
+    artifact = model_registry.get('battery')
+    packed = pack_forest(artifact['model'])
+    packed['scale'] = np.asarray(artifact['scaler'].scale_, dtype=np.float64)
+    packed['min'] = np.asarray(artifact['scaler'].min_, dtype=np.float64)
+    packed['version'] = np.asarray(artifact['version'])
+
+    X = dataset.view()[BATTERY_FEATURES].to_numpy(dtype=np.float64)
+    verify_packed('forest', X, lambda rows: artifact['model'].predict(artifact['scaler'].transform(rows)),
+                  lambda rows: predict_forest(packed, rows * packed['scale'] + packed['min']))
+
+    save_packed(model_registry.path('forest'), packed)
+    print(f"Forest has been exported to '{model_registry.path('forest')}' "
+          f"({len(packed['value'])} node, {len(packed['roots'])} tree)")
+
+# Training IsolationForest sekali, dipakai /deteksi dan /api/anomaly/score
+def train_anomaly_model():
+    X = dataset.view()[ANOMALY_FEATURES].to_numpy(dtype=np.float64)
+    artifact = fit_anomaly_model(X, contamination=0.05, random_state=42)
+    export_anomaly_forest(artifact, X)
+    # IsolationForest + scaler cuma disimpan di anomaly_forest.npz, pkl-nya isi baseline z-score saja
+    artifact = {key: value for key, value in artifact.items() if key not in ('model', 'scaler')}
+    artifact['dataset_hash'] = dataset.version
+    artifact = model_registry.save('anomaly', artifact)
+    print(f"Anomaly model has been saved as 'anomaly_model.pkl' (version {artifact['version']})")
+
+
+def export_anomaly_forest(artifact, X):
+    """Pack IsolationForest hasil fit_anomaly_model jadi anomaly_forest.npz; skor dicek identik dengan sklearn dulu."""
+    packed = pack_anomaly_model(artifact)
+    packed['version'] = np.asarray(new_version())
+
+    verify_packed('IsolationForest', X, lambda rows: score_anomalies(artifact, rows)[1],
+                  lambda rows: score_packed_anomalies(packed, rows)[1], single_step=97)
+
+    save_packed(model_registry.path('anomaly_forest'), packed)
+    print(f"Anomaly forest has been exported to '{model_registry.path('anomaly_forest')}' "
+          f"({len(packed['value'])} node, {len(packed['roots'])} tree)")
+
+# Model cluster: hasil fit /cluster disimpan, centroid di-update per batch /api/ingest
+def train_cluster_model():
+    from online import fit_cluster_model
+
+    # Scaler 1-10, centroid KMeans dan PCA persis seperti hasil /cluster
+    fitted = fitted_model('cluster', CLUSTER_PARAMS, compute_cluster_data)
+    X = dataset.view()[CLUSTER_FEATURES].to_numpy(dtype=np.float64)
+    artifact = fit_cluster_model(X, CLUSTER_FEATURES, random_state=CLUSTER_PARAMS['random_state'], **fitted)
+    artifact['dataset_hash'] = dataset.version
+    artifact = model_registry.save('cluster', artifact)
+    print(f"Cluster model has been saved as 'cluster_model.pkl' (version {artifact['version']})")
+
+
+# Decision tree dari /classification di-compile jadi tabel node untuk /api/classify
+def train_classifier_model():
+    from trees import compile_tree
+
+    fitted = fitted_model('classification', CLASSIFICATION_PARAMS, compute_classification_data)
+    artifact = model_registry.save('classifier', {
+        'model': fitted['tree'],
+        'table': compile_tree(fitted['tree']),
+        'features': fitted['features'],
+        'encoders': fitted['encoders'],
+        'threshold': CLASSIFICATION_PARAMS['high_usage_threshold'],
+        'dataset_hash': dataset.version,
+    })
+    print(f"Classifier has been saved as 'classifier_model.pkl' (version {artifact['version']})")
+
+
+def retrain_models():
+    train_model()
+    report_progress(0.3, 'Training anomaly model')
+    train_anomaly_model()
+    report_progress(0.5, 'Training cluster model')
+    train_cluster_model()
+    report_progress(0.8, 'Training classifier')
+    train_classifier_model()
+
+
+@bp.cli.command('train')
+def train():
+    """Training model prediksi baterai, deteksi anomali & cluster lalu simpan artefaknya (*.pkl)."""
+    retrain_models()
+
+@bp.route('/layout')
 def layout():
     return render_template('layout.html')
 
-@app.route('/')
+@bp.route('/')
 def home():
     print("Flask app running...")
     return render_template('index.html', title="Home", header="Welcome to Flask", active_page="home")
 
-@app.route('/about')
+@bp.route('/about')
 def about():
     print("Flask app running...")
     return render_template('base.html', title="About", header="About Flask")
 
-@app.route('/cluster')
-def cluster():
+def compute_cluster_data(max_clusters, optimal_clusters, random_state, k_search_mode, early_stop_tol,
+                         quality_mode, silhouette_sample_size):
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import MinMaxScaler
+    from ksearch import fit_k, search_k
+    from quality import cluster_quality
+
     # Nentuin kolom yang perlu dinormalisasi min max
-    columns_to_transform = ['App Usage Time (min/day)', 'Screen On Time (hours/day)',
-                            'Battery Drain (mAh/day)', 'Data Usage (MB/day)',
-                            'Number of Apps Installed', 'Age']
+    columns_to_transform = CLUSTER_FEATURES
 
     # Min-max normalisasi dari skala 1-10
     scaler = MinMaxScaler(feature_range=(1, 10))
     df_normalized = pd.DataFrame(
-        scaler.fit_transform(df[columns_to_transform]),
+        # Fit di ndarray: scaler yang sama dipakai online.py untuk array, tanpa nama kolom
+        scaler.fit_transform(dataset.view()[columns_to_transform].to_numpy(dtype=np.float64)),
         columns=columns_to_transform
     )
 
-    # Mencari jumlah cluster optimal pakai elbow method
-    sse = []  # Sum of Squared Errors
-    max_clusters = 10
-
-    for n_clusters in range(1, max_clusters + 1):
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        kmeans.fit(df_normalized)
-        sse.append(kmeans.inertia_)
-
-    # Plotting Elbow Method
-    plt.figure(figsize=(8, 5))
-    plt.plot(range(1, max_clusters + 1, 1), sse, marker='o', linestyle='--')
-    plt.xlabel('Number of Clusters')
-    plt.ylabel('Sum of Squared Errors (SSE)')
-    plt.title('Elbow Method for Optimal Number of Clusters')
-    plt.grid(True)
-
-    # Simpen plot ke objek BytesIO dan encode ke base64
-    img = io.BytesIO()
-    plt.savefig(img, format='png')
-    img.seek(0)
-    plot_url = base64.b64encode(img.getvalue()).decode()
-    plt.close()
-
-    # K-means clustering dengan 5 cluster
-    optimal_clusters = 5
-    kmeans = KMeans(n_clusters=optimal_clusters, random_state=42)
-    df_normalized['Cluster'] = kmeans.fit_predict(df_normalized)
-
-    # Evaluasi pakai silhouette score
-    silhouette_avg = silhouette_score(df_normalized, df_normalized['Cluster'])
+    report_progress(0.1, 'Mencari jumlah cluster optimal')
+    # Mencari jumlah cluster optimal pakai elbow method (paralel / mini-batch / early stop, lihat ksearch.py)
+    with span('kmeans_search'):
+        search = search_k(df_normalized.to_numpy(), max_clusters=max_clusters, mode=k_search_mode,
+                          early_stop_tol=early_stop_tol, random_state=random_state)
+    sse = search['sse']  # Sum of Squared Errors
+
+    # K-means clustering pakai model dari sweep untuk k optimal (tidak di-fit ulang)
+    if optimal_clusters is None:
+        optimal_clusters = search['optimal_k']
+    kmeans = search['models'].get(optimal_clusters)
+    if kmeans is None:
+        kmeans = fit_k(df_normalized.to_numpy(), optimal_clusters, search['mode'], random_state)
+    df_normalized['Cluster'] = kmeans.labels_
+
+    report_progress(0.6, 'Evaluasi kualitas cluster')
+    # Evaluasi pakai silhouette score (exact per chunk / sampel + CI) + Davies-Bouldin & Calinski-Harabasz
+    with span('cluster_quality'):
+        quality = cluster_quality(df_normalized, df_normalized['Cluster'], mode=quality_mode,
+                                  sample_size=silhouette_sample_size, random_state=random_state)
 
     # Reduksi dimensi dengan pca untuk visualisasi
     pca = PCA(n_components=2)
     X_pca = pca.fit_transform(df_normalized)
     df_normalized['PCA1'], df_normalized['PCA2'] = X_pca[:, 0], X_pca[:, 1]
 
-    # Visualisasi clustering pakai scatter plot
-    plt.figure(figsize=(8, 5))
-    scatter = plt.scatter(df_normalized['PCA1'], df_normalized['PCA2'],
-                          c=df_normalized['Cluster'], cmap='viridis', s=50)
-    plt.title('K-Means Clustering Results')
-    plt.xlabel('PCA1')
-    plt.ylabel('PCA2')
-    plt.grid(True)
-
-    # Simpen scatter plot ke objek BytesIO dan encode ke base64
-    img2 = io.BytesIO()
-    plt.savefig(img2, format='png')
-    img2.seek(0)
-    cluster_plot_url = base64.b64encode(img2.getvalue()).decode()
-    plt.close()
+    # Data plot elbow method + visualisasi clustering pakai scatter plot
+    charts = {
+        'plot_url': line_spec(search['ks'], sse, title='Elbow Method for Optimal Number of Clusters',
+                              xlabel='Number of Clusters', ylabel='Sum of Squared Errors (SSE)'),
+        'cluster_plot_url': scatter_spec(X_pca[:, 0], X_pca[:, 1], df_normalized['Cluster'].to_numpy(),
+                                         title='K-Means Clustering Results', xlabel='PCA1', ylabel='PCA2'),
+    }
 
     # Menyusun hasil evaluasi dan plot untuk dikirim ke template
     evaluation = {
-        'Silhouette Score': silhouette_avg,
-        'SSE': sse
+        'Silhouette Score': quality['silhouette'],
+        'Silhouette CI': quality['silhouette_ci'],
+        'Silhouette Mode': quality['mode'],
+        'Davies-Bouldin': quality['davies_bouldin'],
+        'Calinski-Harabasz': quality['calinski_harabasz'],
+        'SSE': [float(s) for s in sse]
     }
 
-    return render_template('cluster.html',
-                           title="Clustering",
-                           header="Clustering",
-                           plot_url=plot_url,
-                           cluster_plot_url=cluster_plot_url,
-                           evaluation=evaluation,
-                           optimal_clusters=optimal_clusters,
-                           active_page="cluster")
-
-
-@app.route('/classification')
-def classification():
-    try:
-        # Identifikasi kolom string dan kategori
-        for column in df.columns:
-            if df[column].dtype == 'object' or df[column].dtype == 'category':
-                print(f"Encoding column: {column}")
-                label_encoder = LabelEncoder()
-                df[column] = label_encoder.fit_transform(df[column].astype(str))
-
-        # Pastikan semua kolom numerik
-        df_cleaned = df.apply(pd.to_numeric, errors='coerce')
-
-        # Debug: Periksa dataset setelah encoding
-        print(df_cleaned.dtypes)
-        print(df_cleaned.head())
-
-        # Membuat kolom target 'High Data Usage'
-        if 'High Data Usage' not in df_cleaned.columns:
-            df_cleaned['High Data Usage'] = (df_cleaned['Data Usage (MB/day)'] > 1000).astype(int)
-
-        # Pisahkan fitur (X) dan target (y)
-        X = df_cleaned.drop(['High Data Usage'], axis=1)
-        y = df_cleaned['High Data Usage']
-
-        # Debug: Periksa data input model
-        print("Features (X):", X.head())
-        print("Target (y):", y.head())
+    return {
+        'charts': charts,
+        'evaluation': evaluation,
+        'optimal_clusters': optimal_clusters,
+        # Model yang sudah di-fit disimpan (flask train -> cluster_model.pkl) untuk /api/cluster/assign
+        'model': {'scaler': scaler, 'centroids': kmeans.cluster_centers_, 'pca': pca},
+    }
 
-        # Pisahkan data menjadi train-test split
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-        # Melatih Decision Tree Classifier
-        model = DecisionTreeClassifier(random_state=42)
+@bp.route('/cluster')
+def cluster():
+    return render_page('cluster', CLUSTER_PARAMS, compute_cluster_data, 'cluster.html',
+                       title="Clustering",
+                       header="Clustering",
+                       active_page="cluster")
+
+
+def compute_classification_data(test_size, random_state, high_usage_threshold):
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.tree import DecisionTreeClassifier
+
+    # View read-only, encoding di bawah cuma mengubah salinan lokal
+    df = dataset.view()
+
+    # Identifikasi kolom string dan kategori
+    encoders = {}
+    for column in df.columns:
+        if df[column].dtype == 'object' or df[column].dtype == 'category':
+            print(f"Encoding column: {column}")
+            label_encoder = LabelEncoder()
+            df[column] = label_encoder.fit_transform(df[column].astype(str))
+            encoders[column] = label_encoder.classes_.tolist()
+
+    # Pastikan semua kolom numerik
+    df_cleaned = df.apply(pd.to_numeric, errors='coerce')
+
+    # Debug: Periksa dataset setelah encoding
+    print(df_cleaned.dtypes)
+    print(df_cleaned.head())
+
+    # Membuat kolom target 'High Data Usage'
+    if 'High Data Usage' not in df_cleaned.columns:
+        df_cleaned['High Data Usage'] = (df_cleaned['Data Usage (MB/day)'] > high_usage_threshold).astype(int)
+
+    # Pisahkan fitur (X) dan target (y)
+    X = df_cleaned.drop(['High Data Usage'], axis=1)
+    y = df_cleaned['High Data Usage']
+
+    # Debug: Periksa data input model
+    print("Features (X):", X.head())
+    print("Target (y):", y.head())
+
+    # Pisahkan data menjadi train-test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    # Melatih Decision Tree Classifier
+    report_progress(0.3, 'Training decision tree')
+    model = DecisionTreeClassifier(random_state=random_state)
+    with span('tree_fit'):
         model.fit(X_train, y_train)
 
-        # Prediksi data uji
-        y_pred = model.predict(X_test)
+    # Prediksi data uji
+    y_pred = model.predict(X_test)
+
+    # Menghitung metrik evaluasi
+    report = classification_report(y_test, y_pred, output_dict=True)
+    cm = confusion_matrix(y_test, y_pred)
 
-        # Menghitung metrik evaluasi
-        report = classification_report(y_test, y_pred, output_dict=True)
-        cm = confusion_matrix(y_test, y_pred)
+    # Data plot Confusion Matrix
+    labels = sorted(pd.unique(np.concatenate([y_test.to_numpy(), y_pred])).tolist())
+    charts = {
+        'plot_url': heatmap_spec(cm, rows=labels, columns=labels, title='Confusion Matrix', fmt='d', cmap='Blues',
+                                 cbar=False, xlabel='Predicted', ylabel='Actual', figsize=(6, 4)),
+    }
 
-        # Plot Confusion Matrix
-        plt.figure(figsize=(6, 4))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
-        plt.title('Confusion Matrix')
-        plt.xlabel('Predicted')
-        plt.ylabel('Actual')
+    return {
+        'report': report,
+        'charts': charts,
+        # Tree + encoding kategori disimpan (flask train -> classifier_model.pkl) untuk /api/classify
+        'model': {'tree': model, 'features': list(X.columns), 'encoders': encoders},
+    }
 
-        # Simpan plot sebagai gambar
-        img = io.BytesIO()
-        plt.savefig(img, format='png')
-        img.seek(0)
-        plot_url = base64.b64encode(img.getvalue()).decode()
-        plt.close()
 
-        # Kirimkan hasil evaluasi ke template
-        return render_template(
+@bp.route('/classification')
+def classification():
+    try:
+        # Kirimkan hasil evaluasi ke template (atau halaman progress kalau masih dihitung)
+        return render_page(
+            'classification', CLASSIFICATION_PARAMS, compute_classification_data,
             'classification.html',
             title="Classification",
             header="Decision Tree Classification",
-            report=report,
-            plot_url=plot_url,
             active_page="classification"
         )
 
@@ -231,261 +610,316 @@ def classification():
         return f"MMF EROR LG NGAB: {str(e)}", 500
 #bentar ya ges menyusul, msh revisi
 
-@app.route('/association')
-def association():
-    # Load data
-    data = pd.read_csv("user_behavior_dataset.csv")
+def dashboard_aggregates(chunksize):
+    # Di-cache per versi dataset; /api/ingest meneruskan agregat versi lama + batch baru ke versi berikutnya
+    return cached_result('aggregates', AGGREGATE_PARAMS, lambda aggregators: stream_dashboard_aggregates(chunksize))
+
+
+# Kolom yang dibaca untuk agregat dashboard
+AGGREGATE_COLUMNS = ['Device Model', 'Operating System', 'App Usage Time (min/day)', 'Number of Apps Installed',
+                     'Screen On Time (hours/day)', 'Battery Drain (mAh/day)', 'Data Usage (MB/day)', 'Gender', 'Age']
+
+
+def stream_dashboard_aggregates(chunksize):
+    # Semua groupby/value_counts dashboard dihitung streaming per chunk dari CSV (memori konstan)
+    with dataset.locked():
+        chunks = iter_csv_chunks(DATASET_PATH, chunksize=chunksize, usecols=AGGREGATE_COLUMNS)
+        return stream_aggregate(chunks, dashboard_aggregators())
 
-    # Preprocessing
-    data = data[['Device Model', 'Operating System', 'App Usage Time (min/day)', 'Number of Apps Installed', 'Screen On Time (hours/day)', 'Battery Drain (mAh/day)', 'Data Usage (MB/day)', 'Age', 'Gender']]
-    grouped_data = data.groupby(['Device Model', 'Operating System']).agg({
-        'App Usage Time (min/day)': 'mean',
-        'Number of Apps Installed': 'mean'
-    }).reset_index()
+
+def dashboard_aggregators():
+    return {
+        'device_model': GroupedMoments('Device Model', [
+            'Number of Apps Installed', 'App Usage Time (min/day)', 'Screen On Time (hours/day)',
+            'Battery Drain (mAh/day)', 'Data Usage (MB/day)']),
+        'device_os': GroupedMoments(['Device Model', 'Operating System'], [
+            'App Usage Time (min/day)', 'Number of Apps Installed']),
+        'gender': GroupedMoments('Gender', ['Screen On Time (hours/day)']),
+        'device_counts': ValueCounts('Device Model'),
+        'os_counts': ValueCounts('Operating System'),
+        # Boxplot Screen On Time per usia: value count per (Age, nilai), bukan baris mentah
+        'age_screen': GroupedValueCounts('Age', 'Screen On Time (hours/day)'),
+    }
+
+
+# Nama aggregator ikut di key cache, agregat lama (tanpa aggregator baru) tidak dipakai ulang
+AGGREGATE_PARAMS = {'aggregators': sorted(dashboard_aggregators())}
+
+
+def association_grouped_data(aggregates):
+    grouped_data = aggregates['device_os'].mean()[[
+        'App Usage Time (min/day)',
+        'Number of Apps Installed'
+    ]].reset_index()
 
     grouped_data['App Usage Category'] = pd.cut(grouped_data['App Usage Time (min/day)'],
                                                 bins=[0, 1, 2, 3, 4, 5, 24],
                                                 labels=['<1h', '1-2h', '2-3h', '3-4h', '4-5h', '>5h'])
+    return grouped_data
+
 
+def compute_rules(min_support, min_confidence, chunksize, mine_once):
+    from mining import build_item_matrix, item_frame, mine
+    from rules import RuleStore
+
+    grouped_data = association_grouped_data(dashboard_aggregates(chunksize))
     association_data = grouped_data[['Device Model', 'Operating System', 'App Usage Category', 'Number of Apps Installed']]
 
-    transaction_list = []
-    for _, row in association_data.iterrows():
-        transaction = [
-            row['Device Model'],
-            row['Operating System'],
-            row['App Usage Category'],
-            f"Apps_{row['Number of Apps Installed']}"
-        ]
-        transaction_list.append(transaction)
-
-    transaction_df = pd.DataFrame(transaction_list)
-    onehot = pd.get_dummies(transaction_df.stack()).groupby(level=0).sum()
-
-    # FP-Growth
-    frequent_itemsets_fp = fpgrowth(onehot, min_support=0.05, use_colnames=True)
-    rules_fp = association_rules(frequent_itemsets_fp, metric="confidence", min_threshold=0.5, num_itemsets=len(frequent_itemsets_fp))
-
-    # Apriori
-    frequent_itemsets_apriori = apriori(onehot, min_support=0.05, use_colnames=True)
-    rules_apriori = association_rules(frequent_itemsets_apriori, metric="confidence", min_threshold=0.5, num_itemsets=len(frequent_itemsets_apriori))
-
-    # Visualization for FP-Growth
-    heatmap_img_fp = io.BytesIO()
+    # Transaksi -> matriks item sparse boolean (tanpa iterrows / get_dummies dense)
+    item_matrix, items = build_item_matrix(association_data,
+                                           ['Device Model', 'Operating System', 'App Usage Category', 'Number of Apps Installed'],
+                                           prefixes={'Number of Apps Installed': 'Apps_'})
+    onehot = item_frame(item_matrix, items)
+
+    # FP-Growth & Apriori (sekali mining kalau mine_once, kalau tidak paralel), disimpan ter-index
+    with span('association_mining'):
+        rules = mine(onehot, min_support, min_confidence, algorithms=('fpgrowth', 'apriori'), mine_once=mine_once)
+    return {algorithm: RuleStore(algorithm_rules) for algorithm, algorithm_rules in rules.items()}
+
+
+def compute_association_data(min_support, min_confidence, chunksize, mine_once):
+    report_progress(0.1, 'Agregasi dataset')
+    aggregates = dashboard_aggregates(chunksize)
+    device_model_means = aggregates['device_model'].mean()
+
+    # Preprocessing
+    grouped_data = association_grouped_data(aggregates)
+
+    report_progress(0.4, 'Mining association rules')
+    rule_stores = cached_result('rules', {'min_support': min_support, 'min_confidence': min_confidence,
+                                          'chunksize': chunksize, 'mine_once': mine_once}, compute_rules)
+    rules_fp = rule_stores['fpgrowth'].frame
+    rules_apriori = rule_stores['apriori'].frame
+
+    # Data untuk tiap chart
     heatmap_data_fp = rules_fp.pivot_table(index='antecedents', columns='consequents', values='confidence', fill_value=0)
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(heatmap_data_fp, annot=True, cmap='coolwarm', fmt=".2f")
-    plt.title('Heatmap of FP-Growth Rules')
-    plt.savefig(heatmap_img_fp, format='png')
-    heatmap_img_fp.seek(0)
-    heatmap_url_fp = base64.b64encode(heatmap_img_fp.getvalue()).decode('utf8')
-
-    # Visualization for Apriori
-    heatmap_img_apriori = io.BytesIO()
     heatmap_data_apriori = rules_apriori.pivot_table(index='antecedents', columns='consequents', values='confidence', fill_value=0)
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(heatmap_data_apriori, annot=True, cmap='coolwarm', fmt=".2f")
-    plt.title('Heatmap of Apriori Rules')
-    plt.savefig(heatmap_img_apriori, format='png')
-    heatmap_img_apriori.seek(0)
-    heatmap_url_apriori = base64.b64encode(heatmap_img_apriori.getvalue()).decode('utf8')
-
-    # Graph Visualization FP
-    graph_img_fp = io.BytesIO()
-    G_fp = nx.DiGraph()
-    for _, row in rules_fp.iterrows():
-        for antecedent in row['antecedents']:
-            G_fp.add_edge(antecedent, row['consequents'], weight=row['confidence'])
-    pos_fp = nx.spring_layout(G_fp)
-    plt.figure(figsize=(12, 12))
-    nx.draw(G_fp, pos_fp, with_labels=True, node_size=2000, node_color='lightblue', font_size=10, font_weight='bold', arrows=True)
-    edge_labels_fp = nx.get_edge_attributes(G_fp, 'weight')
-    nx.draw_networkx_edge_labels(G_fp, pos_fp, edge_labels=edge_labels_fp)
-    plt.savefig(graph_img_fp, format='png')
-    graph_img_fp.seek(0)
-    graph_url_fp = base64.b64encode(graph_img_fp.getvalue()).decode('utf8')
-
-    # Graph Visualization Apriori 
-    graph_img_apriori = io.BytesIO()
-    G_apriori = nx.DiGraph()
-    for _, row in rules_apriori.iterrows():
-        for antecedent in row['antecedents']:
-            G_apriori.add_edge(antecedent, row['consequents'], weight=row['confidence'])
-    pos_apriori = nx.spring_layout(G_apriori)
-    plt.figure(figsize=(12, 12))
-    nx.draw(G_apriori, pos_apriori, with_labels=True, node_size=2000, node_color='lightblue', font_size=10, font_weight='bold', arrows=True)
-    edge_labels_fp = nx.get_edge_attributes(G_apriori, 'weight')
-    nx.draw_networkx_edge_labels(G_apriori, pos_apriori, edge_labels=edge_labels_fp)
-    plt.savefig(graph_img_apriori, format='png')
-    graph_img_apriori.seek(0)
-    graph_url_apriori = base64.b64encode(graph_img_apriori.getvalue()).decode('utf8')
-
-
-    # Generate Device Model
-    device_model_counts = data['Device Model'].value_counts().head(10)
-    operating_system_counts = data['Operating System'].value_counts().head(10)
-    device_img = io.BytesIO()
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x=device_model_counts.values, y=device_model_counts.index, palette='viridis')
-    plt.title('10 Device Model Teratas')
-    plt.xlabel('Jumlah Penggunaan')
-    plt.ylabel('Device Model')
-    plt.savefig(device_img, format='png')
-    device_img.seek(0)
-    device_url = base64.b64encode(device_img.getvalue()).decode('utf8')
-
-    # Generate OS
-    os_img = io.BytesIO()
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x=operating_system_counts.values, y=operating_system_counts.index, palette='viridis')
-    plt.title('10 Operating System Teratas')
-    plt.xlabel('Jumlah Penggunaan')
-    plt.ylabel('Operating System')
-    plt.savefig(os_img, format='png')
-    os_img.seek(0)
-    os_url = base64.b64encode(os_img.getvalue()).decode('utf8')
-
-    # Generate dvm 0
-    dvm = data.groupby('Device Model').agg({
-    'Number of Apps Installed': 'mean',
-    'App Usage Time (min/day)': 'mean'
-    }).reset_index()
+    edges_fp = [(antecedent, itemset_label(consequents), confidence)
+                for antecedents, consequents, confidence in zip(rules_fp['antecedents'], rules_fp['consequents'], rules_fp['confidence'])
+                for antecedent in antecedents]
+    edges_apriori = [(antecedent, itemset_label(consequents), confidence)
+                     for antecedents, consequents, confidence in zip(rules_apriori['antecedents'], rules_apriori['consequents'], rules_apriori['confidence'])
+                     for antecedent in antecedents]
+
+    device_model_counts = aggregates['device_counts'].result().head(10)
+    operating_system_counts = aggregates['os_counts'].result().head(10)
+
+    dvm = device_model_means[[
+        'Number of Apps Installed',
+        'App Usage Time (min/day)'
+    ]].reset_index()
     print(dvm)
-    plt.figure(figsize=(12, 6))
-    dvm_img = io.BytesIO()
-    sns.scatterplot(data=dvm, x='Number of Apps Installed', y='App Usage Time (min/day)', hue='Device Model', palette='rainbow', s=100)
-    plt.title('Hubungan antara Number of Apps Installed dan App Usage Time')
-    plt.xlabel('Rata-rata Jumlah Aplikasi yang Diinstal')
-    plt.ylabel('Rata-rata Waktu Penggunaan Aplikasi (dalam menit)')
-    plt.legend(title="Device Model", fontsize=10)
-    plt.savefig(dvm_img, format='png')
-    dvm_img.seek(0)
-    dvm_url = base64.b64encode(dvm_img.getvalue()).decode('utf8')
-
-    # Generate dvm1
-    dvm1 = data.groupby('Device Model').agg({
-        'App Usage Time (min/day)': 'mean',
-        'Screen On Time (hours/day)': 'mean',
-        'Battery Drain (mAh/day)': 'mean'
-     }).reset_index()
+
+    dvm1 = device_model_means[[
+        'App Usage Time (min/day)',
+        'Screen On Time (hours/day)',
+        'Battery Drain (mAh/day)'
+    ]].reset_index()
     print(dvm1)
-    plt.figure(figsize=(12, 6))
-    dvm1_img = io.BytesIO()
-    sns.scatterplot(data=dvm1, x='App Usage Time (min/day)', y='Screen On Time (hours/day)', hue='Device Model', palette='rainbow', s=100)
-    plt.title('Hubungan antara App Usage Time dan Screen On Time')
-    plt.xlabel('Rata-rata Waktu Penggunaan Aplikasi (dalam menit)')
-    plt.ylabel('Rata-rata Waktu Layar Menyala (dalam menit)')
-    plt.legend(title="Device Model", fontsize=10)
-    plt.savefig(dvm1_img, format='png')
-    dvm1_img.seek(0)
-    dvm1_url = base64.b64encode(dvm1_img.getvalue()).decode('utf8')
-
-
-    # Generate dvm2
+
     correlation_usage_screen = dvm1['App Usage Time (min/day)'].corr(dvm1['Screen On Time (hours/day)'])
     print(f'Korelasi antara App Usage Time dan Screen On Time: {correlation_usage_screen}')
-
-    plt.figure(figsize=(12, 6))
-    sns.scatterplot(data=dvm1, x='Screen On Time (hours/day)', y='Battery Drain (mAh/day)', hue='Device Model', palette='rainbow', s=100)
-    plt.title('Hubungan antara Screen On Time dan Battery Drain')
-    plt.xlabel('Rata-rata Waktu Layar Menyala (dalam menit)')
-    plt.ylabel('Rata-rata Pengurasan Baterai (dalam %)')
-    plt.legend(title="Device Model", fontsize=10)
-        
-    dvm2_img = io.BytesIO()
-    plt.savefig(dvm2_img, format='png')
-    dvm2_img.seek(0)
-    dvm2_url = base64.b64encode(dvm2_img.getvalue()).decode('utf8')
-
     correlation_screen_battery = dvm1['Screen On Time (hours/day)'].corr(dvm1['Battery Drain (mAh/day)'])
     print(f'Korelasi antara Screen On Time dan Battery Drain: {correlation_screen_battery}')
 
+    device_model_analysis = device_model_means[[
+        'Screen On Time (hours/day)',
+        'Data Usage (MB/day)'
+    ]].reset_index()
+    print(device_model_analysis)
 
-    # Generate dvm 3
-    device_model_analysis = data.groupby('Device Model').agg({
-        'Screen On Time (hours/day)': 'mean',
-        'Data Usage (MB/day)': 'mean'
-    }).reset_index()
+    gender_analysis = aggregates['gender'].mean()[['Screen On Time (hours/day)']].reset_index()
+    print(gender_analysis)
 
-    print(device_model_analysis)
+    # Data untuk semua chart (dirender di browser lewat /api/charts, atau PNG di server)
+    age_groups = aggregates['age_screen'].groups()
+    charts = {
+        # Visualization for FP-Growth & Apriori
+        'heatmap_url_fp': heatmap_spec(heatmap_data_fp.to_numpy(),
+                                       rows=map(itemset_label, heatmap_data_fp.index),
+                                       columns=map(itemset_label, heatmap_data_fp.columns),
+                                       title='Heatmap of FP-Growth Rules'),
+        'heatmap_url_apriori': heatmap_spec(heatmap_data_apriori.to_numpy(),
+                                            rows=map(itemset_label, heatmap_data_apriori.index),
+                                            columns=map(itemset_label, heatmap_data_apriori.columns),
+                                            title='Heatmap of Apriori Rules'),
+        'graph_url_fp': graph_spec(edges_fp, title='FP-Growth Network Graph'),
+        'graph_url_apriori': graph_spec(edges_apriori, title='Apriori Network Graph'),
+
+        # Generate Device Model & OS
+        'device_url': bar_spec(device_model_counts.index, device_model_counts.values,
+                               title='10 Device Model Teratas', xlabel='Jumlah Penggunaan', ylabel='Device Model'),
+        'os_url': bar_spec(operating_system_counts.index, operating_system_counts.values,
+                           title='10 Operating System Teratas', xlabel='Jumlah Penggunaan',
+                           ylabel='Operating System'),
+
+        # Generate dvm 0-3
+        'dvm_url': hue_scatter_spec(dvm, x='Number of Apps Installed', y='App Usage Time (min/day)', hue='Device Model',
+                                    title='Hubungan antara Number of Apps Installed dan App Usage Time',
+                                    xlabel='Rata-rata Jumlah Aplikasi yang Diinstal',
+                                    ylabel='Rata-rata Waktu Penggunaan Aplikasi (dalam menit)'),
+        'dvm1_url': hue_scatter_spec(dvm1, x='App Usage Time (min/day)', y='Screen On Time (hours/day)',
+                                     hue='Device Model',
+                                     title='Hubungan antara App Usage Time dan Screen On Time',
+                                     xlabel='Rata-rata Waktu Penggunaan Aplikasi (dalam menit)',
+                                     ylabel='Rata-rata Waktu Layar Menyala (dalam menit)'),
+        'dvm2_url': hue_scatter_spec(dvm1, x='Screen On Time (hours/day)', y='Battery Drain (mAh/day)',
+                                     hue='Device Model',
+                                     title='Hubungan antara Screen On Time dan Battery Drain',
+                                     xlabel='Rata-rata Waktu Layar Menyala (dalam menit)',
+                                     ylabel='Rata-rata Pengurasan Baterai (dalam %)'),
+        'dvm3_url': hue_scatter_spec(device_model_analysis, x='Screen On Time (hours/day)', y='Data Usage (MB/day)',
+                                     hue='Device Model',
+                                     title='Hubungan antara Screen On Time dan Data Usage',
+                                     xlabel='Rata-rata Waktu Layar Menyala (dalam menit)',
+                                     ylabel='Rata-rata Penggunaan Data (dalam MB)'),
+
+        # Generate Gender & Age
+        'gender_url': bar_spec(gender_analysis['Gender'], gender_analysis['Screen On Time (hours/day)'],
+                               title='Rata-rata Screen On Time berdasarkan Gender', xlabel='Gender',
+                               ylabel='Rata-rata Waktu Layar Menyala (dalam menit)',
+                               horizontal=False, palette='rainbow', figsize=(8, 5)),
+        'age_url': box_spec_counts(age_groups, title='Distribusi Screen On Time berdasarkan Usia', xlabel='Usia',
+                                   ylabel='Waktu Layar Menyala (dalam menit)'),
+
+        # Generate Scatter Plot
+        'scatter_url': hue_scatter_spec(grouped_data, x='Number of Apps Installed', y='App Usage Time (min/day)',
+                                        hue='Device Model', title='Number of Apps Installed vs App Usage Time',
+                                        xlabel='Number of Apps Installed', ylabel='App Usage Time (min/day)'),
+    }
 
-    plt.figure(figsize=(12, 6))
-    sns.scatterplot(data=device_model_analysis, x='Screen On Time (hours/day)', y='Data Usage (MB/day)', hue='Device Model', palette='rainbow', s=100)
-    plt.title('Hubungan antara Screen On Time dan Data Usage')
-    plt.xlabel('Rata-rata Waktu Layar Menyala (dalam menit)')
-    plt.ylabel('Rata-rata Penggunaan Data (dalam MB)')
-    plt.legend(title="Device Model", fontsize=10)
+    return {'charts': charts}
 
-    dvm3_img = io.BytesIO()
-    plt.savefig(dvm3_img, format='png')
-    dvm3_img.seek(0)
-    dvm3_url = base64.b64encode(dvm3_img.getvalue()).decode('utf8')
 
+def itemset_label(items):
+    return ', '.join(sorted(map(str, items)))
 
-    # Generate Gender
-    gender_img = io.BytesIO()
-    plt.figure(figsize=(25, 10))
-    gender_analysis = data.groupby('Gender')['Screen On Time (hours/day)'].mean().reset_index()
-    print(gender_analysis)
-    plt.figure(figsize=(8, 5))
-    sns.barplot(data=gender_analysis, x='Gender', y='Screen On Time (hours/day)', palette='rainbow')
-    plt.title('Rata-rata Screen On Time berdasarkan Gender')
-    plt.xlabel('Gender')
-    plt.ylabel('Rata-rata Waktu Layar Menyala (dalam menit)')
-    plt.savefig(gender_img, format='png')
-    gender_img.seek(0)
-    gender_url = base64.b64encode(gender_img.getvalue()).decode('utf8')
-
-
-  # Generate Age
-    age_img = io.BytesIO()  
-    plt.figure(figsize=(12, 6))
-    sns.boxplot(data=data, x='Age', y='Screen On Time (hours/day)', palette='rainbow')
-    plt.title('Distribusi Screen On Time berdasarkan Usia')
-    plt.xlabel('Usia')
-    plt.ylabel('Waktu Layar Menyala (dalam menit)')
-    plt.xticks(rotation=45)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.savefig(age_img, format='png')
-    age_img.seek(0)
-    age_url = base64.b64encode(age_img.getvalue()).decode('utf8')
-
-
-    # Generate Scatter Plot
-    scatter_img = io.BytesIO()
-    plt.figure(figsize=(12, 6))
-    sns.scatterplot(data=grouped_data, x='Number of Apps Installed', y='App Usage Time (min/day)', hue='Device Model', palette='rainbow', s=100)
-    plt.title('Number of Apps Installed vs App Usage Time')
-    plt.xlabel('Number of Apps Installed')
-    plt.ylabel('App Usage Time (min/day)')
-    plt.legend(title="Device Model", fontsize=10)
-    plt.savefig(scatter_img, format='png')
-    scatter_img.seek(0)
-    scatter_url = base64.b64encode(scatter_img.getvalue()).decode('utf8')
-
-
-
-
-    return render_template('association.html',
-                           title="Association Analysis",
-                           header="FP-Growth and Apriori Rules",
-                           heatmap_url_fp=heatmap_url_fp,
-                           heatmap_url_apriori=heatmap_url_apriori,
-                           graph_url_fp=graph_url_fp,
-                           graph_url_apriori = graph_url_apriori,
-                           scatter_url=scatter_url,
-                           device_url = device_url,
-                           os_url=os_url,
-                           dvm_url = dvm_url,
-                           dvm1_url = dvm1_url,
-                           dvm2_url = dvm2_url,
-                           dvm3_url = dvm3_url,
-                           gender_url = gender_url,
-                           age_url = age_url,
-                           active_page="association")
-
-
-@app.route('/prediksi', methods=['GET', 'POST'])
+
+def association_params():
+    return dict(ASSOCIATION_PARAMS,
+                min_support=float_arg('min_support', ASSOCIATION_PARAMS['min_support']),
+                min_confidence=float_arg('min_confidence', ASSOCIATION_PARAMS['min_confidence']))
+
+
+def number_arg(name, default, type=float):
+    # request.args.get(type=...) diam-diam memakai default kalau nilainya tidak valid, jadi di-parse sendiri
+    raw = request.args.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = type(raw)
+    except ValueError:
+        raise ValueError(f"{name} harus berupa angka, bukan {raw!r}") from None
+    if value != value or value in (float('inf'), float('-inf')):
+        raise ValueError(f"{name} harus berupa angka, bukan {raw!r}")
+    return value
+
+
+def float_arg(name, default, low=0.0, high=1.0):
+    # Ambil parameter float dari query string, harus di (low, high]
+    value = number_arg(name, default)
+    if value is None or not low < value <= high:
+        raise ValueError(f"{name} harus di antara {low} dan {high}")
+    return value
+
+
+@bp.route('/association')
+def association():
+    try:
+        params = association_params()
+    except ValueError as e:
+        return f"Error occurred: {str(e)}", 400
+
+    return render_page('association', params, compute_association_data, 'association.html',
+                       title="Association Analysis",
+                       header="FP-Growth and Apriori Rules",
+                       active_page="association")
+
+
+@bp.route('/api/rules')
+def api_rules():
+    try:
+        params = association_params()
+        algorithm = request.args.get('algorithm', 'fpgrowth')
+        sort = request.args.get('sort', 'lift')
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort harus salah satu dari {', '.join(SORT_KEYS)}")
+        offset = max(number_arg('offset', 0, type=int), 0)
+        limit = min(max(number_arg('limit', 20, type=int), 1), 1000)
+        filters = {
+            'min_support': number_arg('filter_support', 0.0),
+            'min_confidence': number_arg('filter_confidence', 0.0),
+            'min_lift': number_arg('filter_lift', 0.0),
+        }
+        rule_stores, job = cached_or_job('rules', params, compute_rules)
+        if job is not None:
+            return job_accepted(job)
+        if algorithm not in rule_stores:
+            raise ValueError(f"algorithm harus salah satu dari {', '.join(rule_stores)}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Filter tambahan di atas rules yang sudah di-mining (min_* di sini tidak memicu mining ulang)
+    total, rules = rule_stores[algorithm].query(
+        antecedent=request.args.get('antecedent'),
+        consequent=request.args.get('consequent'),
+        sort=sort,
+        offset=offset,
+        limit=limit,
+        **filters,
+    )
+    return jsonify({
+        'algorithm': algorithm,
+        'sort': sort,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'rules': rules,
+    })
+
+
+CHART_ROUTES = {
+    'cluster': (lambda: CLUSTER_PARAMS, compute_cluster_data),
+    'classification': (lambda: CLASSIFICATION_PARAMS, compute_classification_data),
+    'association': (association_params, compute_association_data),
+}
+
+
+@bp.route('/api/charts/<route>')
+def api_charts(route):
+    if route not in CHART_ROUTES:
+        return jsonify({'error': f"route harus salah satu dari {', '.join(CHART_ROUTES)}"}), 404
+    get_params, compute_data = CHART_ROUTES[route]
+    try:
+        params = get_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Cuma data series di balik tiap chart, browser yang menggambar
+    data, job = cached_or_job(f'{route}-data', params, without_model(route, params, compute_data))
+    if job is not None:
+        return job_accepted(job)
+    return jsonify({'route': route, 'charts': data['charts']})
+
+
+def job_accepted(job):
+    # 202 + lokasi status; client poll /api/jobs/<id> lalu ulangi request setelah status 'done'
+    response = jsonify({'job': job.snapshot(), 'status_url': url_for('main.api_job', job_id=job.id)})
+    response.status_code = 202
+    response.headers['Location'] = url_for('main.api_job', job_id=job.id)
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+@bp.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job tidak ditemukan'}), 404
+    return jsonify(job.snapshot())
+
+
+@bp.route('/prediksi', methods=['GET', 'POST'])
 def prediksi():
     if request.method == 'POST':
         try:
@@ -496,21 +930,20 @@ def prediksi():
             num_apps_installed = int(request.form['num_apps_installed'])
             age = int(request.form['age'])
 
-            # Preprocess input menjadi data yang sesuai
-            input_data = pd.DataFrame({
-                'App Usage Time (min/day)': [app_usage_time],
-                'Screen On Time (hours/day)': [screen_on_time],
-                'Battery Drain (mAh/day)': [0],  # Menambahkan nilai default untuk fitur yang hilang
-                'Data Usage (MB/day)': [data_usage],
-                'Number of Apps Installed': [num_apps_installed],
-                'Age': [age]
-            })
-
-            # Load model yang sudah disimpan
-            model = joblib.load('model.pkl')
-
-            # Prediksi konsumsi baterai (battery drain)
-            prediction = model.predict(input_data)
+            # Preprocess input menjadi data yang sesuai (urutan sama dengan BATTERY_FEATURES)
+            input_data = np.array([[
+                app_usage_time,
+                screen_on_time,
+                0,  # Menambahkan nilai default untuk fitur yang hilang
+                data_usage,
+                num_apps_installed,
+                age
+            ]], dtype=np.float64)
+            require_finite(input_data, BATTERY_FEATURES)
+
+            # Prediksi konsumsi baterai (battery drain) pakai model dari registry, digabung dengan
+            # request lain yang datang bersamaan
+            prediction = battery_batcher.predict(input_data)
 
             # Tampilkan hasil prediksi
             first_prediction = round(prediction[0], 2)
@@ -528,50 +961,55 @@ def prediksi():
                            header="Prediksi Konsumsi Baterai",
                            active_page="prediksi")
 
-@app.route("/deteksi", methods=["GET", "POST"])
+@bp.route('/api/predict', methods=['POST'])
+def api_predict():
+    try:
+        frame = read_batch()
+        X = batch_matrix(frame, BATTERY_FEATURES, defaults={'Battery Drain (mAh/day)': 0})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Satu panggilan predict untuk seluruh batch; batch kecil digabung dengan request lain
+    predictions = battery_batcher.predict(X)
+    return jsonify({
+        'model_version': model_registry.version('battery'),
+        'count': len(predictions),
+        'predictions': np.round(predictions, 2).tolist(),
+    })
+
+def compute_deteksi(model_version, forest_version):
+    artifact = model_registry.get('anomaly')
+    df = dataset.view()
+    X = df[ANOMALY_FEATURES].to_numpy(dtype=np.float64)
+    anomaly_labels, _ = score_packed_anomalies(model_registry.get('anomaly_forest'), X)
+
+    # Filter data anomali (copy, dataset asli tidak diubah)
+    is_anomaly = anomaly_labels == -1
+    anomalies = df.loc[is_anomaly].copy()
+    anomalies["anomaly"] = -1
+
+    # Analisis penyebab anomali, z-score dihitung sekaligus untuk semua baris anomali
+    anomalies["log"] = explain_anomalies(X[is_anomaly], artifact['mean'], artifact['std'], ANOMALY_FEATURES)
+
+    return {
+        'anomalies': anomalies.to_dict(orient="records"),
+        'columns': list(anomalies.columns),
+    }
+
+
+@bp.route("/deteksi", methods=["GET", "POST"])
 def deteksi():
-    # Pilih kolom numerik yang relevan
-    features = [
-        "App Usage Time (min/day)",
-        "Screen On Time (hours/day)",
-        "Battery Drain (mAh/day)",
-        "Number of Apps Installed",
-        "Data Usage (MB/day)",
-    ]
     if request.method == "POST":
-        # Normalisasi data
-        X = df[features]
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-
-        # Model Isolation Forest
-        iso_forest = IsolationForest(contamination=0.05, random_state=42)
-        anomaly_labels = iso_forest.fit_predict(X_scaled)
-
-        # Tambahkan label ke dataset
-        df["anomaly"] = anomaly_labels
-
-        # Analisis penyebab anomali
-        df["log"] = ""
-        for idx, row in df.iterrows():
-            if row["anomaly"] == -1:  # Hanya untuk anomali
-                deviations = (row[features] - X.mean()) / X.std()  # Deviasi
-                high_deviation = deviations[abs(deviations) > 2]  # Threshold deviasi
-                reasons = ", ".join(
-                    f"{feature} ({row[feature]:.2f})" for feature in high_deviation.index
-                )
-                df.at[idx, "log"] = f"Anomali karena: {reasons}"
-
-        # Filter data anomali
-        anomalies = df[df["anomaly"] == -1]
+        params = {'model_version': model_registry.version('anomaly'),
+                  'forest_version': model_registry.version('anomaly_forest')}
+        result = cached_result('deteksi', params, compute_deteksi)
 
         return render_template(
             "deteksi.html",
             title="Deteksi Anomali",
             header="Hasil Deteksi Anomali",
-            anomalies=anomalies.to_dict(orient="records"),
-            columns=anomalies.columns,
-            active_page="deteksi"
+            active_page="deteksi",
+            **result
         )
 
     return render_template(
@@ -581,5 +1019,511 @@ def deteksi():
         active_page="deteksi"
     )
 
+
+@bp.route('/api/anomaly/score', methods=['POST'])
+def api_anomaly_score():
+    try:
+        frame = read_batch()
+        X = batch_matrix(frame, ANOMALY_FEATURES)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    artifact = model_registry.get('anomaly')
+    forest = model_registry.get('anomaly_forest')
+    labels, scores = score_packed_anomalies(forest, X)
+    logs = explain_anomalies(X, artifact['mean'], artifact['std'], ANOMALY_FEATURES)
+    logs[labels != -1] = ''
+
+    # Skor dari anomaly_forest.npz, log z-score dari baseline anomaly_model.pkl: dua artefak, dua versi
+    return jsonify({
+        'model_version': artifact['version'],
+        'forest_version': forest['version'],
+        'count': len(labels),
+        'anomaly': labels.tolist(),
+        'score': np.round(scores, 6).tolist(),
+        'log': logs.tolist(),
+    })
+
+def encode_categories(frame, encoders):
+    # Kategori -> kode LabelEncoder dari training; nilai yang tidak dikenal ditolak
+    frame = frame.copy()
+    for column, classes in encoders.items():
+        if column not in frame.columns:
+            continue
+        codes = pd.Index(classes).get_indexer(frame[column].astype(str))
+        if (codes < 0).any():
+            unknown = sorted(set(frame[column].astype(str)[codes < 0]))
+            raise ValueError(f"Nilai {column} tidak dikenal: {', '.join(unknown)}")
+        frame[column] = codes
+    return frame
+
+
+def classifier_matrix(frame, artifact):
+    # User ID ikut jadi fitur waktu training (semua kolom dipakai), default 0 kalau tidak dikirim
+    frame = encode_categories(frame, artifact['encoders'])
+    return batch_matrix(frame, artifact['features'], defaults={'User ID': 0})
+
+
+@bp.route('/api/classify', methods=['POST'])
+def api_classify():
+    from trees import predict_tree_proba
+
+    artifact = model_registry.get('classifier')
+    try:
+        X = classifier_matrix(read_batch(), artifact)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Semua baris di-walk sekaligus lewat tabel node (tanpa sklearn predict)
+    proba = predict_tree_proba(artifact['table'], X)
+    classes = artifact['table']['classes']
+    positive = np.flatnonzero(classes == 1)
+    probability = proba[:, positive[0]] if positive.size else np.zeros(len(proba))
+    return jsonify({
+        'model_version': artifact['version'],
+        'threshold': artifact['threshold'],
+        'count': len(proba),
+        'high_data_usage': classes[np.argmax(proba, axis=1)].tolist(),
+        'probability': np.round(probability, 6).tolist(),
+    })
+
+
+@bp.route('/api/cluster/assign', methods=['POST'])
+def api_cluster_assign():
+    from online import assign_clusters
+
+    try:
+        frame = read_batch()
+        X = batch_matrix(frame, CLUSTER_FEATURES)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Satu perhitungan jarak ke semua centroid untuk seluruh batch
+    artifact = model_registry.get('cluster')
+    labels, distances, coordinates = assign_clusters(artifact, X)
+    result = {
+        'model_version': artifact['version'],
+        'count': len(labels),
+        'cluster': labels.tolist(),
+        'distance': np.round(distances, 6).tolist(),
+    }
+    if coordinates is not None:
+        result['pca1'] = np.round(coordinates[:, 0], 6).tolist()
+        result['pca2'] = np.round(coordinates[:, 1], 6).tolist()
+    return jsonify(result)
+
+
+# Satu ingest dalam satu waktu di semua worker: append CSV + update agregat/model harus berurutan.
+# Lock thread untuk request di proses ini, flock eksklusif di file untuk proses lain (gunicorn worker, flask CLI)
+_ingest_lock = threading.Lock()
+
+
+@contextmanager
+def ingest_lock():
+    with _ingest_lock, dataset.locked(exclusive=True):
+        yield
+
+
+def ingest_frame(frame):
+    # Validasi batch terhadap skema dataset; User ID di-generate kalau tidak dikirim
+    current = dataset.view()
+    columns = list(current.columns)
+    missing = [column for column in columns if column != 'User ID' and column not in frame.columns]
+    if missing:
+        raise ValueError(f"Kolom tidak ada: {', '.join(missing)}")
+    if frame.empty:
+        raise ValueError("Batch kosong")
+
+    frame = frame.copy()
+    if 'User ID' not in frame.columns:
+        frame['User ID'] = np.arange(len(frame)) + int(current['User ID'].max()) + 1
+    for column in columns:
+        if isinstance(current[column].dtype, pd.CategoricalDtype):
+            if frame[column].isna().any():
+                raise ValueError(f"Kolom {column} tidak boleh kosong")
+            frame[column] = frame[column].astype(str)
+            continue
+        values = pd.to_numeric(frame[column], errors='coerce')
+        if values.isna().any():
+            raise ValueError(f"Kolom {column} harus numerik")
+        if pd.api.types.is_integer_dtype(current[column].dtype):
+            if not np.array_equal(values, np.round(values)):
+                raise ValueError(f"Kolom {column} harus bilangan bulat")
+            values = values.astype(np.int64)
+        frame[column] = values
+    return frame[columns]
+
+
+def ingest_batch(frame, assign_ids=False):
+    from online import DRIFT_THRESHOLD, partial_fit_cluster_model, update_anomaly_baseline
+
+    with ingest_lock():
+        current = dataset.view()
+        previous_rows = len(current)
+        if assign_ids:
+            # User ID di-generate ulang di dalam lock, worker lain mungkin baru saja menambah baris
+            frame = frame.copy()
+            frame['User ID'] = np.arange(len(frame)) + int(current['User ID'].max()) + 1
+        aggregates = copy.deepcopy(dashboard_aggregates(ASSOCIATION_PARAMS['chunksize']))
+        cluster_model = copy.deepcopy(model_registry.get('cluster'))
+        anomaly_model = copy.deepcopy(model_registry.get('anomaly'))
+
+        # Append ke CSV (sumber data), versi dataset berubah -> cache hasil analisis lama otomatis tidak dipakai.
+        # Hash + parse versi baru cuma memproses baris yang di-append
+        dataset.append(frame)
+        dataset.view()
+
+        # Agregat dashboard versi baru = agregat lama + batch (tanpa baca ulang CSV)
+        stream_aggregate([frame], aggregates)
+        result_cache.set(make_key('aggregates', dataset.version, AGGREGATE_PARAMS), aggregates)
+
+        # Scaler + centroid cluster & baseline anomali di-update incremental
+        partial_fit_cluster_model(cluster_model, frame[CLUSTER_FEATURES].to_numpy(dtype=np.float64))
+        update_anomaly_baseline(anomaly_model, frame[ANOMALY_FEATURES].to_numpy(dtype=np.float64),
+                                n=previous_rows)
+        cluster_model['dataset_hash'] = anomaly_model['dataset_hash'] = dataset.version
+        del cluster_model['version'], anomaly_model['version']
+        cluster_model = model_registry.save('cluster', cluster_model)
+        anomaly_model = model_registry.save('anomaly', anomaly_model)
+
+        # Retrain penuh (background) cuma kalau distribusi data baru sudah bergeser dari data training
+        drift = cluster_model['drift'].report(DRIFT_THRESHOLD)
+        retrain_job = None
+        if drift['drifted']:
+            retrain_job = job_queue.submit(make_key('retrain', dataset.version), retrain_after_drift, label='retrain')
+
+    return {
+        'rows': len(frame),
+        'total_rows': previous_rows + len(frame),
+        'dataset_version': dataset.version,
+        'cluster_model_version': cluster_model['version'],
+        'anomaly_model_version': anomaly_model['version'],
+        'drift': drift,
+        'retrain_job': retrain_job.snapshot() if retrain_job else None,
+    }
+
+
+def retrain_after_drift():
+    # Ingest berikutnya menunggu sampai retrain selesai, supaya model baru tidak ditimpa salinan lama
+    with ingest_lock():
+        retrain_models()
+
+
+@bp.route('/api/ingest', methods=['POST'])
+def api_ingest():
+    try:
+        raw = read_batch()
+        frame = ingest_frame(raw)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(ingest_batch(frame, assign_ids='User ID' not in raw.columns))
+
+
+@bp.cli.command('bench-classify')
+@click.option('--rows', default=100000, help='Jumlah baris (dataset diulang sampai sebanyak ini).')
+@click.option('--requests', 'n_requests', default=200, help='Jumlah request 1 baris.')
+def bench_classify(rows, n_requests):
+    """Bandingkan sklearn predict vs tabel node hasil compile untuk classifier High Data Usage."""
+    from bench import bench_classifier
+
+    artifact = model_registry.get('classifier')
+    X = classifier_matrix(dataset.view(), artifact)
+    X = np.resize(X, (rows, X.shape[1]))
+    result = bench_classifier(artifact, X, n_requests)
+    print(f"{result['rows']} baris, hasil identik dengan sklearn: {result['identical']}")
+    print(f"Batch   sklearn: {result['sklearn_batch_rows_per_s']:,.0f} baris/s, "
+          f"compiled: {result['compiled_batch_rows_per_s']:,.0f} baris/s")
+    print(f"1 baris sklearn: p50 {result['sklearn_single_p50_us']:.1f} us / p99 {result['sklearn_single_p99_us']:.1f} us, "
+          f"compiled: p50 {result['compiled_single_p50_us']:.1f} us / p99 {result['compiled_single_p99_us']:.1f} us")
+
+
+@bp.cli.command('export-forest')
+def export_forest_command():
+    """Pack forest di model.pkl jadi model_forest.npz (array memory-map) untuk /prediksi."""
+    export_forest()
+
+
+@bp.cli.command('bench-forest')
+@click.option('--requests', 'n_requests', default=500, help='Jumlah request 1 baris.')
+@click.option('--batch-size', default=32, help='Ukuran micro-batch.')
+def bench_forest_command(n_requests, batch_size):
+    """Bandingkan latency RandomForestRegressor.predict vs forest yang sudah di-pack."""
+    from bench import bench_forest
+
+    artifact = model_registry.get('battery')
+    packed = model_registry.get('forest')
+    X = artifact['scaler'].transform(dataset.view()[BATTERY_FEATURES].to_numpy(dtype=np.float64))
+    result = bench_forest(artifact, packed, X, n_requests, batch_size)
+    print(f"{result['rows']} baris, hasil identik dengan sklearn: {result['identical']}")
+    print(f"1 baris   sklearn: p50 {result['sklearn_single_p50_us']:.1f} us / p99 {result['sklearn_single_p99_us']:.1f} us, "
+          f"packed: p50 {result['packed_single_p50_us']:.1f} us / p99 {result['packed_single_p99_us']:.1f} us")
+    print(f"{result['batch_size']} baris  sklearn: {result['sklearn_batch_us']:.1f} us, "
+          f"packed: {result['packed_batch_us']:.1f} us")
+
+
+@bp.cli.command('bench-batching')
+@click.option('--concurrency', default='1,4,16,64', help='Daftar jumlah client bersamaan, dipisah koma.')
+@click.option('--requests', 'n_requests', default=2000, help='Jumlah request 1 baris per tingkat concurrency.')
+def bench_batching_command(concurrency, n_requests):
+    """Throughput & latency prediksi 1 baris dari banyak thread: langsung vs lewat micro-batching."""
+    from bench import bench_batcher
+
+    X = dataset.view()[BATTERY_FEATURES].to_numpy(dtype=np.float64)
+    levels = [int(level) for level in concurrency.split(',')]
+    print(f"max batch {battery_batcher.max_batch_size} baris, max wait {battery_batcher.max_wait * 1000:.1f} ms")
+    for row in bench_batcher(predict_battery_drain, battery_batcher, X, levels, n_requests):
+        print(f"{row['concurrency']:>3} client  direct: {row['direct_rps']:,.0f} req/s "
+              f"(p50 {row['direct_p50_ms']:.2f} / p99 {row['direct_p99_ms']:.2f} ms), "
+              f"batched: {row['batched_rps']:,.0f} req/s "
+              f"(p50 {row['batched_p50_ms']:.2f} / p99 {row['batched_p99_ms']:.2f} ms, "
+              f"rata-rata {row['mean_batch_size']:.1f} baris/batch)")
+
+
+def parse_sizes(sizes):
+    # "1e3,1e4,100000" -> [1000, 10000, 100000]
+    return [int(float(size)) for size in sizes.split(',') if size.strip()]
+
+
+@bp.cli.command('generate-dataset')
+@click.option('--rows', default='1e5', help='Jumlah baris (boleh notasi 1e6).')
+@click.option('--output', default='synthetic_dataset.csv', help='File CSV tujuan.')
+@click.option('--seed', default=0, help='Seed generator.')
+@click.option('--chunksize', default=1000000, help='Baris per chunk yang ditulis.')
+def generate_dataset(rows, output, seed, chunksize):
+    """Buat dataset sintetis (skema, kategori, distribusi & korelasi sama dengan dataset asli)."""
+    from synthetic import fit_synthetic, write_synthetic_csv
+
+    n_rows = parse_sizes(rows)[0]
+    write_synthetic_csv(output, fit_synthetic(dataset.view()), n_rows, seed=seed, chunksize=chunksize)
+    print(f"{n_rows:,} baris sintetis ditulis ke '{output}'")
+
+
+@bp.cli.command('bench-suite')
+@click.option('--sizes', default='1e3,1e4,1e5,1e6,1e7', help='Ukuran dataset sintetis, dipisah koma.')
+@click.option('--kernels', default='', help='Kernel yang dijalankan, dipisah koma (default semua).')
+@click.option('--max-seconds', default=60.0, help='Lewati ukuran yang diperkirakan lebih lama dari ini per kernel.')
+@click.option('--max-memory', default=4096, help='Lewati ukuran yang diperkirakan butuh peak memori lebih dari ini (MiB).')
+@click.option('--seed', default=0, help='Seed dataset sintetis.')
+@click.option('--output', default='bench_results.json', help='File JSON hasil (dipakai sebagai baseline berikutnya).')
+@click.option('--baseline', default=None, help='JSON hasil sebelumnya untuk dibandingkan.')
+@click.option('--tolerance', default=1.25, help='Rasio waktu terhadap baseline yang dianggap regresi.')
+def bench_suite(sizes, kernels, max_seconds, max_memory, seed, output, baseline, tolerance):
+    """Waktu & peak memori tiap kernel analisis pada dataset sintetis 10^3-10^7 baris."""
+    import json
+
+    from bench import KERNELS, compare_results, environment, run_suite
+    from synthetic import fit_synthetic
+
+    kernels = [kernel for kernel in kernels.split(',') if kernel] or list(KERNELS)
+    unknown = [kernel for kernel in kernels if kernel not in KERNELS]
+    if unknown:
+        raise click.BadParameter(f"kernel tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(KERNELS)})")
+
+    results = run_suite(fit_synthetic(dataset.view()), parse_sizes(sizes), kernels, max_seconds,
+                        max_memory * 2 ** 20, seed)
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': seed, 'environment': environment(),
+              'results': results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan di '{output}'")
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare_results(results, json.load(f), tolerance)
+        for kernel, rows, ratio in regressions:
+            print(f"REGRESI {kernel} ({rows:,} baris): {ratio:.2f}x lebih lambat dari baseline")
+        if regressions:
+            raise SystemExit(1)
+        print(f"Tidak ada regresi (toleransi {tolerance:.2f}x)")
+
+
+def prediksi_form_sampler(frame):
+    # Input form /prediksi acak di dalam range dataset
+    fields = {'app_usage_time': 'App Usage Time (min/day)', 'screen_on_time': 'Screen On Time (hours/day)',
+              'data_usage': 'Data Usage (MB/day)', 'num_apps_installed': 'Number of Apps Installed', 'age': 'Age'}
+    ranges = {field: (float(frame[column].min()), float(frame[column].max())) for field, column in fields.items()}
+
+    def sample(rng):
+        form = {field: rng.uniform(low, high) for field, (low, high) in ranges.items()}
+        form['screen_on_time'] = round(form['screen_on_time'], 1)
+        for field in ('app_usage_time', 'data_usage', 'num_apps_installed', 'age'):
+            form[field] = int(form[field])
+        return form
+    return sample
+
+
+# Mix default load test: nama route -> bobot
+LOAD_MIX = {'home': 1, 'cluster': 1, 'classification': 1, 'association': 1, 'prediksi': 4, 'deteksi': 1}
+
+
+@bp.cli.command('loadtest')
+@click.option('--url', default=None, help='Base URL server yang sudah jalan; kosong = lewat test client.')
+@click.option('--concurrency', default=8, help='Jumlah client bersamaan.')
+@click.option('--requests', 'n_requests', default=500, help='Jumlah request total (diabaikan kalau --duration diisi).')
+@click.option('--duration', default=None, type=float, help='Lama load test (detik).')
+@click.option('--mix', default='', help='Bobot route, mis. "prediksi=8,cluster=1" (route lain 0).')
+@click.option('--warmup', default=1, help='Request per route sebelum pengukuran.')
+@click.option('--seed', default=0, help='Seed pemilihan route & input form.')
+@click.option('--output', default=None, help='Simpan laporan ke JSON.')
+@click.option('--baseline', default=None, help='Laporan JSON sebelumnya untuk dibandingkan.')
+def loadtest_command(url, concurrency, n_requests, duration, mix, warmup, seed, output, baseline):
+    """Load test concurrent: throughput, p50/p95/p99, error rate & ukuran response per route."""
+    import json
+
+    from loadtest import HttpTarget, Route, TestClientTarget, format_report, run_load, summarize
+
+    routes = {
+        'home': Route('home', 'GET', '/'),
+        'cluster': Route('cluster', 'GET', '/cluster'),
+        'classification': Route('classification', 'GET', '/classification'),
+        'association': Route('association', 'GET', '/association'),
+        'prediksi': Route('prediksi', 'POST', '/prediksi', form=prediksi_form_sampler(dataset.view())),
+        'deteksi': Route('deteksi', 'POST', '/deteksi'),
+    }
+    weights = dict(LOAD_MIX)
+    if mix:
+        weights = {name: 0 for name in routes}
+        for part in mix.split(','):
+            name, _, weight = part.partition('=')
+            if name.strip() not in routes:
+                raise click.BadParameter(f"route tidak dikenal: {name} (pilihan: {', '.join(routes)})")
+            weights[name.strip()] = float(weight or 1)
+    selected = [name for name in routes if weights.get(name, 0) > 0]
+
+    target = HttpTarget(url) if url else TestClientTarget(current_app._get_current_object())
+    samples, elapsed = run_load(target, [routes[name] for name in selected], [weights[name] for name in selected],
+                                concurrency=concurrency, n_requests=None if duration else n_requests,
+                                duration=duration, warmup=warmup, seed=seed)
+    report = summarize(samples, elapsed)
+    report.update({'target': url or 'test-client', 'concurrency': concurrency,
+                   'mix': {name: weights[name] for name in selected}})
+
+    previous = None
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)
+    print(f"{len(samples)} request dalam {elapsed:.1f} s, {concurrency} client ({report['target']})")
+    print(format_report(report, previous))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan di '{output}'")
+
+
+@bp.cli.command('precompute')
+def precompute():
+    """Hitung ulang dan simpan hasil /cluster, /classification dan /association ke cache."""
+    for name, params, compute_data in [
+        ('cluster', CLUSTER_PARAMS, compute_cluster_data),
+        ('classification', CLASSIFICATION_PARAMS, compute_classification_data),
+        ('association', ASSOCIATION_PARAMS, compute_association_data),
+    ]:
+        data = cached_result(f'{name}-data', params, without_model(name, params, compute_data))
+        cached_result(f'{name}-png', params, lambda **_: render_charts(data['charts']))
+        print(f"Cache '{name}' siap")
+
+
+# Metric per request: durasi & jumlah per route, high-water mark RSS, plus header Server-Timing
+# berisi durasi tiap tahap (span) yang jalan di request itu
+REQUEST_SECONDS = metrics_registry.histogram('http_request_duration_seconds', 'Durasi request per route.')
+REQUESTS = metrics_registry.counter('http_requests_total', 'Jumlah request per route, method dan status.')
+REQUEST_PEAK_GROWTH = metrics_registry.counter('http_request_peak_rss_growth_bytes_total',
+                                               'Kenaikan peak RSS proses selama request per route (request lain '
+                                               'yang jalan bersamaan ikut terhitung).')
+BATCHER_BATCHES = metrics_registry.gauge('prediction_batches', 'Jumlah panggilan predict gabungan (micro-batch).')
+BATCHER_ROWS = metrics_registry.gauge('prediction_batched_rows', 'Jumlah baris yang diprediksi lewat micro-batch.')
+
+
+@metrics_registry.collector
+def collect_batcher():
+    stats = battery_batcher.stats()
+    BATCHER_BATCHES.set(stats['batches'], batcher=battery_batcher.name)
+    BATCHER_ROWS.set(stats['rows'], batcher=battery_batcher.name)
+
+
+def route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+@bp.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.request_peak_rss = peak_rss_bytes()
+    start_request_spans()
+    # X-Profile: 1 -> thread request ini dijalankan di bawah cProfile (kalau ALLOW_PROFILING aktif).
+    # Job background (202 + /api/jobs) jalan di thread lain dan tidak ikut ter-profile
+    g.profiler = None
+    if current_app.config['ALLOW_PROFILING'] and request.headers.get('X-Profile') == '1':
+        g.profiler = start_profile()
+
+
+@bp.after_app_request
+def finish_request_metrics(response):
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    route = route_label()
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route)
+    REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    growth = peak_rss_bytes() - g.get('request_peak_rss', 0)
+    if growth > 0:
+        REQUEST_PEAK_GROWTH.inc(growth, route=route)
+
+    spans = finish_request_spans()
+    response.headers['Server-Timing'] = server_timing(spans + [('total', elapsed)])
+    if g.get('profiler') is not None:
+        response.headers['X-Profile-File'] = stop_profile(g.pop('profiler'), f'{request.method} {route}')
+    return response
+
+
+@bp.teardown_app_request
+def stop_request_profile(error=None):
+    # Request yang gagal sebelum after_request tetap harus melepas profiler
+    if g.get('profiler') is not None:
+        stop_profile(g.pop('profiler'), f'{request.method} {route_label()} error')
+    finish_request_spans()
+
+
+def template_render_started(sender, template, context, **extra):
+    g.setdefault('template_starts', []).append(time.perf_counter())
+
+
+def template_render_finished(sender, template, context, **extra):
+    record_stage(f'template.{template.name}', time.perf_counter() - g.template_starts.pop())
+
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    return metrics_registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@bp.app_errorhandler(ModelNotFound)
+def model_not_found(e):
+    if request.path.startswith('/api/'):
+        return jsonify({'error': str(e)}), 503
+    return f"Error occurred: {str(e)}", 503
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    # PRELOAD_MODELS=1: artefak model langsung di-load saat start, bukan di request pertama
+    app.config['PRELOAD_MODELS'] = os.environ.get('PRELOAD_MODELS') == '1'
+    # ALLOW_PROFILING=1: request dengan header X-Profile: 1 di-profile (cProfile, hasil di .cache/profiles).
+    # Cuma thread request-nya; analisis yang dijalankan sebagai job background tidak masuk profile
+    app.config['ALLOW_PROFILING'] = os.environ.get('ALLOW_PROFILING') == '1'
+    app.config.update(config or {})
+    app.register_blueprint(bp)
+    # Bagian dari ETag halaman analisis: template berubah -> cache HTML & ETag lama tidak dipakai
+    app.config.setdefault('TEMPLATE_VERSION', template_version(os.path.join(app.root_path, app.template_folder)))
+    before_render_template.connect(template_render_started, app)
+    template_rendered.connect(template_render_finished, app)
+
+    # Startup tidak pernah training; artefak dibuat sekali lewat `flask train`
+    for name in ('battery', 'anomaly', 'anomaly_forest', 'cluster', 'classifier'):
+        if not os.path.exists(model_registry.path(name)):
+            print(f"Model '{name}' belum ada ({model_registry.path(name)}), jalankan `flask train`")
+        elif app.config['PRELOAD_MODELS']:
+            model_registry.get(name)
+    return app
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
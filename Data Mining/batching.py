@@ -0,0 +1,122 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+import numpy as np
+
+
+# Maksimum baris per panggilan predict gabungan
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 32))
+# Request pertama di batch menunggu paling lama sekian milidetik sebelum batch dijalankan
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 2))
+
+
+class MicroBatcher:
+    """Gabungkan request prediksi kecil yang datang bersamaan jadi satu panggilan `predict` vectorized.
+
+    Tiap request masuk antrian lalu menunggu hasilnya; satu worker thread mengambil request pertama,
+    mengumpulkan request lain sampai `max_batch_size` baris atau `max_wait_ms` lewat (tidak menunggu
+    kalau tidak ada request lain yang sedang berjalan), memanggil
+    `predict` sekali untuk semua baris lalu membagikan hasilnya per request. Latency tambahan per
+    request paling lama `max_wait_ms` + waktu satu batch; request yang sudah >= max_batch_size baris
+    langsung dipanggil tanpa antrian.
+    """
+
+    def __init__(self, predict, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, name='batcher'):
+        self.predict_batch = predict
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def predict(self, X, timeout=None):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) == 0 or len(X) >= self.max_batch_size:
+            return self.predict_batch(X)
+
+        future = Future()
+        self._start()
+        with self._lock:
+            self._inflight += 1
+        try:
+            self._queue.put((X, future))
+            return future.result(timeout)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def _start(self):
+        # Worker dibuat saat request pertama (bukan saat import), jadi aman untuk server yang fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._run(batch)
+            except Exception:
+                # Worker tidak boleh mati; error predict sudah diteruskan ke request di _run
+                traceback.print_exc()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size:
+            # Semua request yang sedang menunggu sudah ada di batch: tidak ada yang perlu ditunggu
+            # (request tunggal saat sepi langsung jalan tanpa tambahan latency)
+            if len(batch) >= self._inflight and self._queue.empty():
+                break
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self, batch):
+        batch = [(X, future) for X, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        arrays = [X for X, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            predictions = self.predict_batch(np.vstack(arrays))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.rows += len(predictions)
+        bounds = np.cumsum([len(X) for X in arrays])[:-1]
+        for future, result in zip(futures, np.split(np.asarray(predictions), bounds)):
+            future.set_result(result)
@@ -0,0 +1,374 @@
+import time
+import warnings
+
+import numpy as np
+
+
+def timeit(func, repeat=5):
+    # Waktu terbaik dari beberapa kali jalan (detik)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def latencies(func, inputs):
+    # Latency per panggilan (detik), satu panggilan per input
+    result = np.empty(len(inputs))
+    for i, value in enumerate(inputs):
+        start = time.perf_counter()
+        func(value)
+        result[i] = time.perf_counter() - start
+    return result
+
+
+def bench_classifier(artifact, X, n_requests=200):
+    """sklearn DecisionTreeClassifier.predict vs tabel node compile (trees.py), batch dan per request."""
+    model, table = artifact['model'], artifact['table']
+    with warnings.catch_warnings():
+        # Tree di-fit dengan DataFrame, di sini input array tanpa nama kolom
+        warnings.simplefilter('ignore', UserWarning)
+        return _bench_classifier(model, table, X, n_requests)
+
+
+def _bench_classifier(model, table, X, n_requests):
+    from trees import predict_tree
+
+    identical = np.array_equal(model.predict(X), predict_tree(table, X))
+
+    sklearn_batch = timeit(lambda: model.predict(X))
+    compiled_batch = timeit(lambda: predict_tree(table, X))
+
+    rows = [X[i:i + 1] for i in range(min(n_requests, len(X)))]
+    sklearn_single = latencies(model.predict, rows)
+    compiled_single = latencies(lambda row: predict_tree(table, row), rows)
+
+    return {
+        'rows': len(X),
+        'identical': bool(identical),
+        'sklearn_batch_rows_per_s': len(X) / sklearn_batch,
+        'compiled_batch_rows_per_s': len(X) / compiled_batch,
+        'sklearn_single_p50_us': float(np.percentile(sklearn_single, 50) * 1e6),
+        'compiled_single_p50_us': float(np.percentile(compiled_single, 50) * 1e6),
+        'sklearn_single_p99_us': float(np.percentile(sklearn_single, 99) * 1e6),
+        'compiled_single_p99_us': float(np.percentile(compiled_single, 99) * 1e6),
+    }
+
+
+def bench_forest(artifact, packed, X, n_requests=500, batch_size=32):
+    """RandomForestRegressor.predict sklearn vs forest hasil pack (trees.py), per request dan micro-batch."""
+    from trees import predict_forest
+
+    model = artifact['model']
+    identical = np.array_equal(model.predict(X), predict_forest(packed, X))
+
+    rows = [X[i:i + 1] for i in range(min(n_requests, len(X)))]
+    sklearn_single = latencies(model.predict, rows)
+    packed_single = latencies(lambda row: predict_forest(packed, row), rows)
+    batch = X[:batch_size]
+
+    return {
+        'rows': len(X),
+        'identical': bool(identical),
+        'sklearn_single_p50_us': float(np.percentile(sklearn_single, 50) * 1e6),
+        'packed_single_p50_us': float(np.percentile(packed_single, 50) * 1e6),
+        'sklearn_single_p99_us': float(np.percentile(sklearn_single, 99) * 1e6),
+        'packed_single_p99_us': float(np.percentile(packed_single, 99) * 1e6),
+        'batch_size': len(batch),
+        'sklearn_batch_us': timeit(lambda: model.predict(batch)) * 1e6,
+        'packed_batch_us': timeit(lambda: predict_forest(packed, batch)) * 1e6,
+    }
+
+
+def concurrent_latencies(func, rows, concurrency):
+    """Jalankan func(row) untuk semua baris dari `concurrency` thread; return (latency per panggilan, total detik)."""
+    import threading
+
+    result = np.empty(len(rows))
+    chunks = [range(start, len(rows), concurrency) for start in range(concurrency)]
+
+    def client(indexes):
+        for i in indexes:
+            start = time.perf_counter()
+            func(rows[i])
+            result[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result, time.perf_counter() - start
+
+
+def bench_batcher(predict, batcher, X, concurrency=(1, 4, 16, 64), n_requests=2000):
+    """Request 1 baris dari banyak thread: panggilan predict langsung vs lewat MicroBatcher."""
+    rows = [X[i % len(X):i % len(X) + 1] for i in range(n_requests)]
+    results = []
+    for clients in concurrency:
+        row = {'concurrency': clients}
+        before = batcher.stats()
+        for mode, func in [('direct', predict), ('batched', batcher.predict)]:
+            elapsed, total = concurrent_latencies(func, rows, clients)
+            row[f'{mode}_rps'] = len(rows) / total
+            row[f'{mode}_p50_ms'] = float(np.percentile(elapsed, 50) * 1e3)
+            row[f'{mode}_p99_ms'] = float(np.percentile(elapsed, 99) * 1e3)
+        # Mode direct tidak lewat batcher, jadi selisih stats = batch dari mode batched saja
+        after = batcher.stats()
+        row['mean_batch_size'] = ((after['rows'] - before['rows']) / (after['batches'] - before['batches'])
+                                  if after['batches'] > before['batches'] else 0.0)
+        results.append(row)
+    return results
+
+
+# Suite kernel analisis (flask bench-suite): tiap kernel = (setup(frame) -> args, run(*args)).
+# Setup (normalisasi, label cluster, encoding) tidak ikut diukur.
+
+def _cluster_matrix(frame):
+    from sklearn.preprocessing import MinMaxScaler
+    from app import CLUSTER_FEATURES
+
+    return MinMaxScaler(feature_range=(1, 10)).fit_transform(frame[CLUSTER_FEATURES].to_numpy(dtype=np.float64))
+
+
+def _cluster_labels(frame):
+    from ksearch import MINIBATCH_MIN_ROWS, fit_k
+
+    X = _cluster_matrix(frame)
+    mode = 'minibatch' if len(X) >= MINIBATCH_MIN_ROWS else 'full'
+    return X, fit_k(X, 3, mode=mode).labels_
+
+
+def _elbow_sweep(X):
+    from ksearch import search_k
+
+    return search_k(X, max_clusters=10, mode='auto', early_stop_tol=0.01)
+
+
+def _silhouette(X, labels):
+    from quality import cluster_quality
+
+    return cluster_quality(X, labels, mode='auto', sample_size=5000)
+
+
+def _pca(X):
+    from sklearn.decomposition import PCA
+
+    return PCA(n_components=2).fit_transform(X)
+
+
+def _encoded_classification(frame):
+    # Sama seperti /classification: kolom kategori di-encode, target High Data Usage
+    X = frame.copy()
+    for column in X.select_dtypes(include=['category', 'object']).columns:
+        X[column] = X[column].astype('category').cat.codes
+    y = (X['Data Usage (MB/day)'] > 1000).astype(int)
+    return X, y
+
+
+def _tree_training(X, y):
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeClassifier
+
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    return DecisionTreeClassifier(random_state=42).fit(X_train, y_train)
+
+
+def _anomaly_matrix(frame):
+    from anomaly import ANOMALY_FEATURES
+
+    return (frame[ANOMALY_FEATURES].to_numpy(dtype=np.float64),)
+
+
+def _isolation_forest(X):
+    from anomaly import explain_anomalies, fit_anomaly_model, score_anomalies
+
+    artifact = fit_anomaly_model(X, contamination=0.05, random_state=42)
+    labels, _ = score_anomalies(artifact, X)
+    outliers = X[labels == -1]
+    return explain_anomalies(outliers, artifact['mean'], artifact['std'], artifact['features'])
+
+
+def _transactions(frame):
+    # Transaksi per user (bukan rata-rata per device seperti /association) supaya ukurannya ikut n
+    import pandas as pd
+
+    transactions = frame[['Device Model', 'Operating System', 'Number of Apps Installed']].copy()
+    transactions['App Usage Category'] = pd.cut(frame['App Usage Time (min/day)'] / 60,
+                                                bins=[0, 1, 2, 3, 4, 5, 24],
+                                                labels=['<1h', '1-2h', '2-3h', '3-4h', '4-5h', '>5h'])
+    return (transactions,)
+
+
+def _onehot_mining(transactions):
+    from mining import build_item_matrix, item_frame, mine
+
+    matrix, items = build_item_matrix(transactions, list(transactions.columns),
+                                      prefixes={'Number of Apps Installed': 'Apps_'})
+    return mine(item_frame(matrix, items), 0.05, 0.5)
+
+
+def _groupby_aggregation(frame, chunksize=100000):
+    from aggregate import stream_aggregate
+    from app import dashboard_aggregators
+
+    chunks = (frame.iloc[start:start + chunksize] for start in range(0, len(frame), chunksize))
+    return stream_aggregate(chunks, dashboard_aggregators())
+
+
+def _chart_specs(frame):
+    from charts import bar_spec, box_spec, render_spec, scatter_spec
+
+    counts = frame['Device Model'].value_counts()
+    age_groups = {age: group.to_numpy() for age, group in frame.groupby('Age')['Screen On Time (hours/day)']}
+    specs = {
+        'scatter': scatter_spec(frame['App Usage Time (min/day)'].to_numpy(), frame['Battery Drain (mAh/day)'].to_numpy(),
+                                frame['User Behavior Class'].to_numpy(), title='Scatter', xlabel='x', ylabel='y'),
+        'box': box_spec(age_groups, title='Box', xlabel='Usia', ylabel='Screen On Time'),
+        'bar': bar_spec(counts.index.astype(str), counts.to_numpy(), title='Bar', xlabel='Count', ylabel='Device'),
+    }
+    # Render sekali dulu: import matplotlib, font cache dll. tidak ikut diukur
+    for spec in specs.values():
+        render_spec(spec)
+    return (specs,)
+
+
+def _figure_rendering(specs):
+    from charts import render_spec
+
+    # Di proses ini (bukan process pool), yang diukur build figure + savefig + base64
+    return {name: render_spec(spec) for name, spec in specs.items()}
+
+
+KERNELS = {
+    'elbow_sweep': (lambda frame: (_cluster_matrix(frame),), _elbow_sweep),
+    'silhouette': (_cluster_labels, _silhouette),
+    'pca': (lambda frame: (_cluster_matrix(frame),), _pca),
+    'tree_training': (_encoded_classification, _tree_training),
+    'isolation_forest': (_anomaly_matrix, _isolation_forest),
+    'onehot_mining': (_transactions, _onehot_mining),
+    'groupby_aggregation': (lambda frame: (frame,), _groupby_aggregation),
+    'figure_rendering': (_chart_specs, _figure_rendering),
+}
+
+
+def _read_hwm():
+    # VmHWM (peak RSS) dari /proc, byte
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    raise OSError('VmHWM tidak ada')
+
+
+def _release_free_memory():
+    # glibc menahan memori yang sudah di-free; dikembalikan ke OS supaya RSS awal = memori yang dipakai
+    import ctypes
+    import ctypes.util
+
+    try:
+        ctypes.CDLL(ctypes.util.find_library('c')).malloc_trim(0)
+    except (OSError, AttributeError, TypeError):
+        pass
+
+
+def measure(func, repeat=3, max_repeat_seconds=1.0):
+    """Return (waktu terbaik dalam detik, peak memori tambahan dalam byte) untuk func().
+
+    Peak memori: high-water mark RSS di-reset (/proc/self/clear_refs, Linux) sebelum jalan pertama,
+    jadi yang terukur puncak selama kernel, dikurangi RSS sebelum mulai. Di luar Linux pakai
+    kenaikan ru_maxrss (cuma terukur kalau melewati puncak proses sebelumnya).
+    """
+    import gc
+
+    from metrics import current_rss_bytes, peak_rss_bytes
+
+    gc.collect()
+    _release_free_memory()
+    baseline = current_rss_bytes()
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        read_peak = _read_hwm
+    except OSError:
+        baseline = max(baseline, peak_rss_bytes())
+        read_peak = peak_rss_bytes
+
+    start = time.perf_counter()
+    func()
+    best = time.perf_counter() - start
+    peak = max(read_peak() - baseline, 0)
+    # Kernel lambat cukup sekali jalan
+    for _ in range(repeat - 1 if best < max_repeat_seconds else 0):
+        best = min(best, timeit(func, repeat=1))
+    return best, peak
+
+
+def run_suite(spec, sizes, kernels=None, max_seconds=60.0, max_memory=4 * 2 ** 30, seed=0, log=print):
+    """Jalankan kernel analisis di dataset sintetis berbagai ukuran.
+
+    Ukuran berikutnya dilewati untuk kernel yang (ekstrapolasi linear dari ukuran sebelumnya)
+    diperkirakan lebih lama dari max_seconds atau butuh peak memori lebih dari max_memory byte.
+    """
+    from synthetic import generate_synthetic
+
+    kernels = kernels or list(KERNELS)
+    results = []
+    last = {}
+    for rows in sorted(sizes):
+        frame = generate_synthetic(spec, rows, seed=seed)
+        for name in kernels:
+            previous = last.get(name)
+            if previous is not None:
+                scale = rows / previous[0]
+                if previous[1] * scale > max_seconds or previous[2] * scale > max_memory:
+                    results.append({'kernel': name, 'rows': rows, 'skipped': True})
+                    log(f"{name:<20} {rows:>10,} baris  dilewati (perkiraan > {max_seconds:.0f} s "
+                        f"atau > {max_memory / 2 ** 20:,.0f} MiB)")
+                    continue
+            setup, run = KERNELS[name]
+            args = setup(frame)
+            seconds, peak = measure(lambda: run(*args))
+            del args
+            last[name] = (rows, seconds, peak)
+            results.append({'kernel': name, 'rows': rows, 'seconds': seconds, 'peak_bytes': int(peak)})
+            log(f"{name:<20} {rows:>10,} baris  {seconds * 1000:>10.1f} ms  peak +{peak / 2 ** 20:,.1f} MiB")
+        del frame
+    return results
+
+
+def environment():
+    import os
+    import platform
+
+    import pandas as pd
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def compare_results(results, baseline, tolerance=1.25, min_delta=0.01):
+    """Bandingkan dengan baseline JSON; return list (kernel, rows, rasio waktu) yang lebih lambat dari tolerance.
+
+    Selisih di bawah min_delta detik diabaikan (kernel sub-milidetik terlalu noisy untuk rasio).
+    """
+    previous = {(entry['kernel'], entry['rows']): entry for entry in baseline['results'] if not entry.get('skipped')}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry['kernel'], entry['rows']))
+        if entry.get('skipped') or old is None or old['seconds'] <= 0:
+            continue
+        ratio = entry['seconds'] / old['seconds']
+        if ratio > tolerance and entry['seconds'] - old['seconds'] > min_delta:
+            regressions.append((entry['kernel'], entry['rows'], ratio))
+    return regressions
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_LOOKUPS, span
+
+
+# Hash isi file dataset, di-cache berdasarkan (mtime, size) supaya file tidak dibaca ulang tiap request.
+# State sha256 ikut disimpan: kalau file cuma di-append, hash dilanjutkan dari byte yang baru saja
+_file_hash_cache = {}
+_file_hash_lock = threading.Lock()
+# Potongan akhir file yang dicocokkan untuk memastikan file cuma di-append
+TAIL_BYTES = 4096
+
+
+def read_tail(f, size):
+    f.seek(max(size - TAIL_BYTES, 0))
+    return f.read(min(size, TAIL_BYTES))
+
+
+def file_hash(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _file_hash_lock:
+        cached = _file_hash_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        inode = os.fstat(f.fileno()).st_ino
+        sha, offset = hashlib.sha256(), 0
+        if cached:
+            # File yang sama dan potongan akhirnya tidak berubah -> lanjutkan dari offset terakhir
+            cached_inode, size, state, tail = cached[2]
+            if cached_inode == inode and size <= stat.st_size and read_tail(f, size) == tail:
+                sha, offset = state.copy(), size
+        f.seek(offset)
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+        size = f.tell()
+        tail = read_tail(f, size)
+    digest = sha.hexdigest()
+
+    with _file_hash_lock:
+        _file_hash_cache[path] = (signature, digest, (inode, size, sha, tail))
+    return digest
+
+
+def make_key(name, data_hash, params=None):
+    # Key = hash dari nama analisis + hash dataset + parameter analisis
+    payload = json.dumps({'name': name, 'data': data_hash, 'params': params or {}},
+                         sort_keys=True, default=str)
+    return f"{name}-{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+
+class ResultCache:
+    """LRU cache hasil analisis, disimpan di memori dan di disk (joblib)."""
+
+    def __init__(self, directory='.cache/results', max_entries=32, max_disk_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.joblib")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                CACHE_LOOKUPS.inc(result='memory')
+                return self._memory[key]
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            CACHE_LOOKUPS.inc(result='miss')
+            return None
+        import joblib
+
+        try:
+            with span('cache_disk_load'):
+                value = joblib.load(path)
+        except Exception:
+            # File rusak / setengah ditulis, anggap miss
+            CACHE_LOOKUPS.inc(result='miss')
+            return None
+        CACHE_LOOKUPS.inc(result='disk')
+        os.utime(path)  # tandai baru dipakai untuk LRU di disk
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        import joblib
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with span('cache_disk_store'):
+            joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        self._remember(key, value)
+        self._evict_disk()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        # Satu lock per key, jadi request bersamaan untuk key yang sama cuma menghitung sekali
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                self.set(key, value)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for name in os.listdir(self.directory):
+            if name.endswith('.joblib'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Worker lain bisa menghapus / mengganti file di antara listdir dan stat -> file yang hilang dilewati
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.joblib'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
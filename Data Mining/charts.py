@@ -0,0 +1,261 @@
+import base64
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from metrics import record_stage
+
+
+# Jumlah proses untuk render chart; 0/1 = render di thread request (tetap thread-safe, tanpa pyplot)
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Batas titik scatter yang dikirim ke client / di-plot
+MAX_SCATTER_POINTS = 5000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Spec chart: dict JSON-able {'type': ..., data..., 'title', 'xlabel', 'ylabel'}.
+# Spec yang sama dipakai untuk /api/charts (render di browser) dan fallback PNG di server.
+
+def line_spec(x, y, title, xlabel, ylabel):
+    return {'type': 'line', 'x': list(x), 'y': [float(v) for v in y],
+            'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def scatter_spec(x, y, labels, title, xlabel, ylabel, random_state=42):
+    x, y, labels = np.asarray(x), np.asarray(y), np.asarray(labels)
+    if len(x) > MAX_SCATTER_POINTS:
+        keep = np.sort(np.random.default_rng(random_state).choice(len(x), MAX_SCATTER_POINTS, replace=False))
+        x, y, labels = x[keep], y[keep], labels[keep]
+    return {'type': 'scatter', 'x': np.round(x, 4).tolist(), 'y': np.round(y, 4).tolist(),
+            'labels': labels.tolist(), 'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def hue_scatter_spec(data, x, y, hue, title, xlabel, ylabel):
+    return {'type': 'hue_scatter', 'x': data[x].astype(float).tolist(), 'y': data[y].astype(float).tolist(),
+            'hue': data[hue].astype(str).tolist(), 'legend': hue,
+            'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def bar_spec(labels, values, title, xlabel, ylabel, horizontal=True, palette='viridis', figsize=(12, 6)):
+    return {'type': 'bar', 'labels': [str(label) for label in labels], 'values': [float(v) for v in values],
+            'horizontal': horizontal, 'palette': palette, 'figsize': list(figsize),
+            'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def heatmap_spec(values, rows, columns, title, fmt='.2f', cmap='coolwarm', cbar=True, xlabel='', ylabel='',
+                 figsize=(12, 8)):
+    return {'type': 'heatmap', 'values': np.asarray(values, dtype=float).tolist(),
+            'rows': [str(r) for r in rows], 'columns': [str(c) for c in columns],
+            'fmt': fmt, 'cmap': cmap, 'cbar': cbar, 'figsize': list(figsize),
+            'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def graph_spec(edges, title=''):
+    # edges: list (source, target, weight)
+    return {'type': 'graph', 'edges': [[str(s), str(t), round(float(w), 4)] for s, t, w in edges], 'title': title}
+
+
+def box_spec(groups, title, xlabel, ylabel, max_fliers=100):
+    # groups: {label: array nilai}; yang dikirim cuma statistik boxplot, bukan data mentah
+    counted = {label: np.unique(np.asarray(values, dtype=float), return_counts=True) for label, values in groups.items()}
+    return box_spec_counts(counted, title, xlabel, ylabel, max_fliers=max_fliers)
+
+
+def count_percentile(values, counts, q):
+    """np.percentile (method 'linear') dari pasangan (nilai unik terurut, jumlah) tanpa meng-expand baris."""
+    cumulative = np.cumsum(counts)
+    n = int(cumulative[-1])
+    position = (n - 1) * (np.asarray(q, dtype=float) / 100)
+    below = np.floor(position)
+    lower = values[np.searchsorted(cumulative, below, side='right')]
+    upper = values[np.searchsorted(cumulative, np.minimum(below + 1, n - 1), side='right')]
+    # Interpolasi sama persis dengan numpy (_lerp), jadi hasilnya identik bit-per-bit
+    t = position - below
+    diff = upper - lower
+    return np.where(t >= 0.5, upper - diff * (1 - t), lower + diff * t)
+
+
+def box_spec_counts(groups, title, xlabel, ylabel, max_fliers=100):
+    # groups: {label: (nilai unik terurut, jumlah)}, mis. dari aggregate.GroupedValueCounts
+    stats = []
+    for label, (values, counts) in groups.items():
+        q1, med, q3 = count_percentile(values, counts, [25, 50, 75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        outside = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+        fliers = np.repeat(values[outside], np.minimum(counts[outside], max_fliers))
+        stats.append({'label': str(label), 'q1': float(q1), 'med': float(med), 'q3': float(q3),
+                      'whislo': float(inside.min()), 'whishi': float(inside.max()),
+                      'fliers': fliers[:max_fliers].tolist()})
+    return {'type': 'box', 'stats': stats, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel}
+
+
+def figure_png(fig):
+    img = io.BytesIO()
+    try:
+        fig.savefig(img, format='png')
+    finally:
+        fig.clear()
+    return img.getvalue()
+
+
+def figure_to_base64(fig):
+    return base64.b64encode(figure_png(fig)).decode('utf8')
+
+
+def new_axes(figsize):
+    from matplotlib.figure import Figure
+
+    # Figure berdiri sendiri (bukan dari pyplot), jadi tidak ada state global yang dibagi antar thread
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+def _labels(ax, spec):
+    ax.set_title(spec.get('title', ''))
+    if spec.get('xlabel'):
+        ax.set_xlabel(spec['xlabel'])
+    if spec.get('ylabel'):
+        ax.set_ylabel(spec['ylabel'])
+
+
+def line_chart(spec):
+    fig, ax = new_axes((8, 5))
+    ax.plot(spec['x'], spec['y'], marker='o', linestyle='--')
+    _labels(ax, spec)
+    ax.grid(True)
+    return fig
+
+
+def scatter_chart(spec):
+    fig, ax = new_axes((8, 5))
+    ax.scatter(spec['x'], spec['y'], c=spec['labels'], cmap='viridis', s=50)
+    _labels(ax, spec)
+    ax.grid(True)
+    return fig
+
+
+def hue_scatter_chart(spec):
+    import seaborn as sns
+
+    fig, ax = new_axes((12, 6))
+    sns.scatterplot(x=spec['x'], y=spec['y'], hue=spec['hue'], palette='rainbow', s=100, ax=ax)
+    _labels(ax, spec)
+    ax.legend(title=spec['legend'], fontsize=10)
+    return fig
+
+
+def bar_chart(spec):
+    import seaborn as sns
+
+    fig, ax = new_axes(spec['figsize'])
+    if spec['horizontal']:
+        sns.barplot(x=spec['values'], y=spec['labels'], hue=spec['labels'], palette=spec['palette'], ax=ax)
+    else:
+        sns.barplot(x=spec['labels'], y=spec['values'], hue=spec['labels'], palette=spec['palette'], ax=ax)
+    _labels(ax, spec)
+    return fig
+
+
+def heatmap_chart(spec):
+    import seaborn as sns
+
+    fig, ax = new_axes(spec['figsize'])
+    values = np.asarray(spec['values'], dtype=float)
+    if spec['fmt'] == 'd':
+        values = values.astype(int)
+    sns.heatmap(values, annot=True, cmap=spec['cmap'], fmt=spec['fmt'], cbar=spec['cbar'],
+                xticklabels=spec['columns'], yticklabels=spec['rows'], ax=ax)
+    _labels(ax, spec)
+    return fig
+
+
+def graph_chart(spec):
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    for source, target, weight in spec['edges']:
+        graph.add_edge(source, target, weight=weight)
+    pos = nx.spring_layout(graph, seed=42)
+
+    fig, ax = new_axes((12, 12))
+    nx.draw(graph, pos, ax=ax, with_labels=True, node_size=2000, node_color='lightblue', font_size=10,
+            font_weight='bold', arrows=True)
+    nx.draw_networkx_edge_labels(graph, pos, ax=ax, edge_labels=nx.get_edge_attributes(graph, 'weight'))
+    return fig
+
+
+def box_chart(spec):
+    from matplotlib import colormaps
+
+    fig, ax = new_axes((12, 6))
+    stats = spec['stats']
+    artists = ax.bxp(stats, patch_artist=True)
+    colors = colormaps['rainbow'](np.linspace(0, 1, max(len(stats), 1)))
+    for patch, color in zip(artists['boxes'], colors):
+        patch.set_facecolor(color)
+    _labels(ax, spec)
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+CHART_TYPES = {
+    'line': line_chart,
+    'scatter': scatter_chart,
+    'hue_scatter': hue_scatter_chart,
+    'bar': bar_chart,
+    'heatmap': heatmap_chart,
+    'graph': graph_chart,
+    'box': box_chart,
+}
+
+
+def render_spec(spec):
+    """spec -> (png base64, durasi per tahap); durasi diukur di proses yang me-render (bisa worker pool)."""
+    start = time.perf_counter()
+    fig = CHART_TYPES[spec['type']](spec)
+    built = time.perf_counter()
+    png = figure_png(fig)
+    saved = time.perf_counter()
+    encoded = base64.b64encode(png).decode('utf8')
+    return encoded, {'chart_build': built - start, 'savefig': saved - built,
+                     'base64_encode': time.perf_counter() - saved}
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver: worker tidak di-fork dari proses server yang multi-thread
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['charts', 'matplotlib.figure'])
+            _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=context)
+        return _pool
+
+
+def render_charts(specs):
+    """specs: {nama: spec chart} -> {nama: png base64}.
+
+    Semua chart di-render bersamaan di process pool, jadi latency ~ chart paling lambat.
+    """
+    if CHART_WORKERS <= 1 or len(specs) <= 1:
+        results = {name: render_spec(spec) for name, spec in specs.items()}
+    else:
+        pool = _get_pool()
+        futures = {name: pool.submit(render_spec, spec) for name, spec in specs.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    pngs = {}
+    for name, (png, timings) in results.items():
+        for stage, seconds in timings.items():
+            record_stage(stage, seconds)
+        pngs[name] = png
+    return pngs
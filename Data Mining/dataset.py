@@ -0,0 +1,217 @@
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+try:
+    import fcntl
+except ImportError:  # Windows: cukup lock antar thread
+    fcntl = None
+
+from cache import file_hash, read_tail
+from metrics import span
+
+
+# Copy-on-write: view yang dibagikan ke route tidak bisa mengubah data asli.
+# Di pandas 3 sudah selalu aktif (opsi ini deprecated), jadi cuma di-set untuk versi lama.
+if int(pd.__version__.split('.')[0]) < 3:
+    try:
+        pd.set_option('mode.copy_on_write', True)
+    except (KeyError, ValueError):
+        pass
+
+CATEGORICAL_COLUMNS = ['Device Model', 'Operating System', 'Gender']
+
+
+def parse_dataset(path, **kwargs):
+    data = pd.read_csv(path, dtype={column: 'category' for column in CATEGORICAL_COLUMNS}, **kwargs)
+
+    for column in data.select_dtypes(include='integer').columns:
+        data[column] = pd.to_numeric(data[column], downcast='integer')
+    for column in data.select_dtypes(include='floating').columns:
+        # Float cuma diperkecil kalau tidak ada nilai yang berubah
+        narrowed = data[column].astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64).to_numpy(), data[column].to_numpy(), equal_nan=True):
+            data[column] = narrowed
+    return data
+
+
+def extend_frame(frame, rows):
+    # Gabung frame lama + baris baru; kategori di-union (terurut, sama seperti hasil read_csv penuh)
+    columns = {}
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([frame[column].array, rows[column].astype('category').array],
+                                                 sort_categories=True)
+        else:
+            columns[column] = np.concatenate([frame[column].to_numpy(), rows[column].to_numpy()])
+    return pd.DataFrame(columns)
+
+
+def publish_shared(frame, directory):
+    """Tulis tiap kolom sebagai .npy supaya semua worker bisa attach via memory-map tanpa parse ulang."""
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return
+    tmp_dir = f"{directory}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    os.makedirs(tmp_dir)
+    meta = {'columns': []}
+    for i, column in enumerate(frame.columns):
+        values = frame[column]
+        entry = {'name': column, 'file': f"{i}.npy"}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry['categories'] = [str(c) for c in values.cat.categories]
+            values = values.cat.codes
+        np.save(os.path.join(tmp_dir, entry['file']), values.to_numpy())
+        meta['columns'].append(entry)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Worker lain sudah publish duluan
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def attach_shared(directory):
+    # Kolom numerik langsung pakai array memory-map (read-only, zero-copy, dibagi antar proses lewat page cache)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    columns = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            values = pd.Categorical.from_codes(values, categories=entry['categories'])
+        columns[entry['name']] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+class DatasetStore:
+    """Dataset di-parse sekali, disimpan ke Parquet + kolom .npy (memory-map), dibagikan sebagai view read-only."""
+
+    def __init__(self, path, cache_dir='.cache/dataset', shared_dir='.cache/shared', lock_path=None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.shared_dir = shared_dir
+        self.lock_path = lock_path
+        self.version = None
+        self._frame = None
+        self._signature = None
+        # (inode, size, potongan akhir) dari isi CSV yang sedang dipegang, untuk parse incremental setelah append
+        self._source = None
+        self._lock = threading.Lock()
+        self._held = threading.local()
+
+    @contextmanager
+    def locked(self, exclusive=False):
+        """flock di lock_path: append pegang lock eksklusif, baca CSV (hash/parse/stream) pegang lock shared.
+
+        Reentrant per thread, jadi view() di dalam ingest tidak menunggu lock eksklusifnya sendiri.
+        """
+        if fcntl is None or self.lock_path is None or getattr(self._held, 'active', False):
+            yield
+            return
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._held.active = True
+            try:
+                yield
+            finally:
+                self._held.active = False
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, frame):
+        # Append in place: biayanya sebanding dengan ukuran batch, bukan seluruh dataset.
+        # Reader memegang lock shared, jadi tidak pernah membaca baris yang setengah ditulis
+        with self.locked(exclusive=True):
+            with open(self.path, 'a', newline='') as f:
+                frame.to_csv(f, header=False, index=False)
+
+    def _parquet_path(self, version):
+        return os.path.join(self.cache_dir, f"{version}.parquet")
+
+    def _read_source(self):
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            return stat.st_ino, stat.st_size, read_tail(f, stat.st_size)
+
+    def _parse_appended(self, source):
+        # File yang sama, cuma bertambah di belakang (/api/ingest) -> parse baris barunya saja
+        if self._frame is None or self._source is None:
+            return None
+        inode, size, tail = self._source
+        if source[0] != inode or source[1] <= size or not tail.endswith(b'\n'):
+            return None
+        with open(self.path, 'rb') as f:
+            if read_tail(f, size) != tail:
+                return None
+            f.seek(size)
+            appended = f.read(source[1] - size)
+        rows = parse_dataset(io.BytesIO(appended), header=None, names=list(self._frame.columns))
+        return extend_frame(self._frame, rows)
+
+    def _load(self):
+        version = file_hash(self.path)
+        source = self._read_source()
+        shared_path = os.path.join(self.shared_dir, version)
+        if os.path.exists(os.path.join(shared_path, 'meta.json')):
+            return version, source, attach_shared(shared_path)
+
+        parquet_path = self._parquet_path(version)
+        frame = None
+        if os.path.exists(parquet_path):
+            try:
+                frame = pd.read_parquet(parquet_path)
+            except (ImportError, OSError, ValueError):
+                frame = None
+        if frame is None:
+            frame = self._parse_appended(source)
+        if frame is None:
+            frame = parse_dataset(self.path)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+                frame.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, parquet_path)
+            except ImportError:
+                # pyarrow/fastparquet tidak ter-install, cukup cache di memori
+                pass
+
+        # Publish sekali, lalu attach juga di proses ini supaya halaman memorinya dibagi dengan worker lain
+        os.makedirs(self.shared_dir, exist_ok=True)
+        publish_shared(frame, shared_path)
+        self._prune(version)
+        return version, source, attach_shared(shared_path)
+
+    def _prune(self, version):
+        # Versi lama (mis. sebelum /api/ingest) dihapus; worker yang masih me-map file lama tetap aman di POSIX
+        for name in os.listdir(self.shared_dir):
+            if name != version and not name.endswith('.tmp'):
+                shutil.rmtree(os.path.join(self.shared_dir, name), ignore_errors=True)
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.parquet') and name != f"{version}.parquet":
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def view(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._signature != signature:
+            # Urutan lock: flock dulu baru lock thread, sama seperti ingest (flock eksklusif -> view())
+            with self.locked(), self._lock:
+                if self._signature != signature:
+                    with span('dataset_load'):
+                        self.version, self._source, self._frame = self._load()
+                    self._signature = signature
+        # Shallow copy + copy-on-write: murah, dan perubahan di route tidak bocor ke store
+        return self._frame.copy(deep=False)
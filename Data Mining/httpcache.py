@@ -0,0 +1,66 @@
+import gzip
+import hashlib
+import os
+
+
+# Level kompresi body halaman yang disimpan (dikompresi sekali, dikirim berkali-kali)
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 9))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 11))
+
+
+def _brotli():
+    # brotli opsional; tanpa library itu halaman cuma disimpan gzip
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings():
+    # Urutan = preferensi server kalau client menerima beberapa encoding dengan bobot sama
+    return ['br', 'gzip'] if _brotli() is not None else ['gzip']
+
+
+def compress_page(html):
+    """HTML hasil render -> {encoding: body terkompresi}; versi identity tidak disimpan."""
+    body = html.encode('utf-8')
+    stored = {'gzip': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 'length': len(body)}
+    brotli = _brotli()
+    if brotli is not None:
+        stored['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return stored
+
+
+def page_body(stored, encoding):
+    # encoding None: client tidak menerima kompresi, body di-decompress dari versi gzip
+    if encoding is None:
+        return gzip.decompress(stored['gzip'])
+    return stored[encoding]
+
+
+def negotiate_encoding(accept_encodings, stored=None):
+    encodings = [encoding for encoding in available_encodings() if stored is None or encoding in stored]
+    return accept_encodings.best_match(encodings)
+
+
+def page_etag(key, encoding):
+    # Strong ETag per representasi: body gzip / br / identity beda byte, jadi ETag-nya juga beda
+    return f"{key}-{encoding}" if encoding else key
+
+
+def template_version(folder):
+    """Hash nama + isi semua template, supaya ETag halaman cuma berubah kalau isi template berubah.
+
+    mtime tidak dipakai: checkout / deploy ulang dengan isi yang sama (atau worker di mesin lain)
+    tetap menghasilkan ETag yang sama.
+    """
+    sha = hashlib.sha256()
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            sha.update(os.path.relpath(path, folder).replace(os.sep, '/').encode() + b'\0')
+            with open(path, 'rb') as f:
+                sha.update(hashlib.sha256(f.read()).digest())
+    return sha.hexdigest()[:16]
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Jumlah analisis berat yang boleh jalan bersamaan di background
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_current = threading.local()
+
+
+def report_progress(progress, message=None):
+    # Dipanggil dari dalam fungsi analisis; di luar job (mis. CLI precompute) tidak melakukan apa-apa
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job.update(progress, message)
+
+
+class Job:
+    def __init__(self, key, label):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = 'Menunggu antrian'
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def update(self, progress, message=None):
+        with self._lock:
+            self.progress = max(self.progress, min(float(progress), 1.0))
+            if message is not None:
+                self.message = message
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'label': self.label,
+                'status': self.status,
+                'progress': round(self.progress, 3),
+                'message': self.message,
+                'error': self.error,
+                'elapsed': round((self.finished or time.time()) - self.created, 3),
+            }
+
+
+class JobQueue:
+    """Antrian job in-process: analisis berat dijalankan di thread pool, request langsung dapat job id.
+
+    Job dengan key yang sama (nama analisis + hash dataset + parameter) yang masih queued/running
+    digabung jadi satu, jadi request identik yang datang bersamaan cuma menghitung sekali.
+    Hasilnya sendiri tidak disimpan di job tapi di ResultCache (lewat fungsi `compute`), job cuma
+    menyimpan status/progress dan disimpan selama `ttl` detik supaya statusnya masih bisa di-poll.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, ttl=3600, max_jobs=1000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, compute, label=None):
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+
+            self._prune()
+            job = Job(key, label or key)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+        self._executor.submit(self._run, job, compute)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, compute):
+        _current.job = job
+        with job._lock:
+            job.status = RUNNING
+            job.message = 'Sedang diproses'
+        try:
+            compute()
+        except Exception as e:
+            traceback.print_exc()
+            with job._lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.message = 'Gagal'
+        else:
+            with job._lock:
+                job.status = DONE
+                job.progress = 1.0
+                job.message = 'Selesai'
+        finally:
+            _current.job = None
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+
+    def _prune(self):
+        # Dipanggil dengan self._lock dipegang
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished is not None]
+        for job in finished:
+            if now - job.finished > self.ttl:
+                del self._jobs[job.id]
+        finished = [job for job in finished if job.id in self._jobs]
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            for job in sorted(finished, key=lambda job: job.finished)[:excess]:
+                self._jobs.pop(job.id, None)
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+
+# Di atas jumlah baris ini pakai MiniBatchKMeans / process pool kalau mode-nya 'auto'
+MINIBATCH_MIN_ROWS = 50000
+PARALLEL_MIN_ROWS = 20000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def fit_k(X, n_clusters, mode='full', random_state=42, batch_size=4096):
+    if mode == 'minibatch':
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state,
+                                batch_size=batch_size, n_init=3)
+    else:
+        model = KMeans(n_clusters=n_clusters, random_state=random_state)
+    model.fit(X)
+    return model
+
+
+def _fit_k_task(args):
+    # X dikirim sebagai path .npy dan di-memory-map di worker, bukan di-pickle per task
+    path, n_clusters, mode, random_state, batch_size = args
+    return fit_k(np.load(path, mmap_mode='r'), n_clusters, mode, random_state, batch_size)
+
+
+def _reset_pool():
+    # Worker mati (mis. OOM): pool dibuang supaya sweep berikutnya membuat pool baru
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool, _pool_workers = None, 0
+
+
+def _get_pool(n_jobs):
+    # Satu pool untuk semua sweep; forkserver karena search_k dipanggil dari thread job queue
+    # di server yang multi-thread (fork dari proses seperti itu tidak aman)
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < n_jobs:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['ksearch'])
+            _pool = ProcessPoolExecutor(max_workers=n_jobs, mp_context=context)
+            _pool_workers = n_jobs
+        return _pool
+
+
+def find_knee(ks, sse):
+    # Kneedle: titik dengan jarak terbesar dari garis lurus antara titik pertama dan terakhir
+    if len(ks) < 3:
+        return ks[-1]
+    x = np.asarray(ks, dtype=np.float64)
+    y = np.asarray(sse, dtype=np.float64)
+    x = (x - x[0]) / (x[-1] - x[0])
+    y_range = y[0] - y[-1]
+    if y_range <= 0:
+        return ks[0]
+    y = (y - y[-1]) / y_range
+    # Kurva SSE menurun & cembung, jarak ke garis y = 1 - x
+    distance = (1 - x) - y
+    return ks[int(np.argmax(distance))]
+
+
+def search_k(X, max_clusters=10, mode='auto', n_jobs=None, early_stop_tol=0.0,
+             random_state=42, batch_size=4096):
+    """Elbow sweep k=1..max_clusters, return dict berisi ks, sse, optimal_k dan model yang sudah di-fit.
+
+    early_stop_tol > 0: sweep berhenti kalau penurunan SSE relatif (dibanding SSE k=1)
+    dua kali berturut-turut lebih kecil dari tol.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_rows = len(X)
+    max_clusters = min(max_clusters, n_rows)
+
+    if mode == 'auto':
+        mode = 'minibatch' if n_rows >= MINIBATCH_MIN_ROWS else 'full'
+    if n_jobs is None:
+        n_jobs = (os.cpu_count() or 1) if n_rows >= PARALLEL_MIN_ROWS else 1
+    n_jobs = max(1, min(n_jobs, max_clusters))
+
+    ks, sse, models = [], [], {}
+    flat_steps = 0
+    executor = _get_pool(n_jobs) if n_jobs > 1 else None
+    shared_path = None
+    if executor:
+        fd, shared_path = tempfile.mkstemp(suffix='.npy', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, X)
+    try:
+        # Fit per gelombang (n_jobs k sekaligus) supaya early stopping tetap bisa jalan
+        next_k = 1
+        while next_k <= max_clusters:
+            wave = list(range(next_k, min(next_k + n_jobs, max_clusters + 1)))
+            if executor:
+                fitted = executor.map(_fit_k_task, [(shared_path, k, mode, random_state, batch_size) for k in wave])
+            else:
+                fitted = (fit_k(X, k, mode, random_state, batch_size) for k in wave)
+
+            stop = False
+            for k, model in zip(wave, fitted):
+                if stop:
+                    continue
+                ks.append(k)
+                sse.append(float(model.inertia_))
+                models[k] = model
+                if early_stop_tol > 0 and len(sse) > 1:
+                    drop = (sse[-2] - sse[-1]) / sse[0] if sse[0] else 0.0
+                    flat_steps = flat_steps + 1 if drop < early_stop_tol else 0
+                    stop = flat_steps >= 2
+            if stop:
+                break
+            next_k = wave[-1] + 1
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    finally:
+        if shared_path:
+            os.remove(shared_path)
+
+    optimal_k = find_knee(ks, sse)
+    return {
+        'ks': ks,
+        'sse': sse,
+        'optimal_k': optimal_k,
+        'model': models[optimal_k],
+        'models': models,
+        'mode': mode,
+    }
@@ -0,0 +1,227 @@
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+
+class Route:
+    """Satu jenis request di mix load test; form: fungsi rng -> dict field form (POST) atau None."""
+
+    def __init__(self, name, method, path, form=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.form = form
+
+
+def _location_path(location, prefix=''):
+    # Header Location (relatif / absolut) -> path relatif ke target, mis. /api/jobs/<id>
+    if not location:
+        return None
+    parts = urlsplit(location)
+    path = parts.path[len(prefix):] if prefix and parts.path.startswith(prefix) else parts.path
+    return path + (f"?{parts.query}" if parts.query else '')
+
+
+# Session: send(method, path, form) -> (status, body, path Location atau None)
+class TestClientTarget:
+    # Request lewat app.test_client() di proses ini (tanpa network / server)
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, form=None):
+            response = client.open(path, method=method, data=form)
+            return response.status_code, response.get_data(), _location_path(response.headers.get('Location'))
+        return send
+
+
+class HttpTarget:
+    # Request HTTP ke server yang sudah jalan (flask run / gunicorn), satu koneksi keep-alive per client
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+
+    def session(self):
+        state = {'conn': None}
+
+        def send(method, path, form=None):
+            body = urlencode(form) if form else None
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form else {}
+            for attempt in range(2):
+                if state['conn'] is None:
+                    state['conn'] = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    state['conn'].request(method, self.prefix + path, body=body, headers=headers)
+                    response = state['conn'].getresponse()
+                    body = response.read()
+                    return response.status, body, _location_path(response.getheader('Location'), self.prefix)
+                except (http.client.HTTPException, ConnectionError):
+                    # Koneksi keep-alive yang sudah ditutup server: buka ulang sekali
+                    state['conn'].close()
+                    state['conn'] = None
+                    if attempt:
+                        raise
+        return send
+
+
+def warm_route(send, route, form=None, timeout=600, poll_interval=0.2):
+    """Panggil route sampai tidak dijawab 202 lagi; job background-nya (Location: /api/jobs/<id>) ditunggu selesai.
+
+    Return status terakhir route itu (job yang gagal tidak diulang).
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        status, _, location = send(route.method, route.path, form)
+        if status != 202 or location is None:
+            return status
+        while True:
+            job_status, body, _ = send('GET', location)
+            state = json.loads(body).get('status') if job_status == 200 else 'failed'
+            if state in ('done', 'failed'):
+                break
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"warmup {route.name}: job belum selesai setelah {timeout} s")
+            time.sleep(poll_interval)
+        if state == 'failed':
+            return status
+
+
+def run_load(target, routes, weights, concurrency=8, n_requests=None, duration=None, warmup=1, seed=0):
+    """Jalankan mix request dari `concurrency` client bersamaan.
+
+    Berhenti setelah n_requests request (total semua client) atau setelah duration detik.
+    warmup: tiap route dipanggil sekian kali berurutan dulu (tidak dicatat), supaya model/cache ter-load;
+    route yang menjawab 202 ditunggu sampai job-nya selesai (warm_route).
+    Return (samples, detik): samples = list (route, status, detik, byte, error).
+    """
+    if n_requests is None and duration is None:
+        raise ValueError("n_requests atau duration harus diisi")
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    send = target.session()
+    for route in routes:
+        for _ in range(warmup):
+            warm_route(send, route, route.form(np.random.default_rng(seed)) if route.form else None)
+
+    lock = threading.Lock()
+    remaining = [n_requests]
+    samples = []
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [None]
+
+    def take():
+        with lock:
+            if remaining[0] is not None:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+        return deadline[0] is None or time.perf_counter() < deadline[0]
+
+    def client(index):
+        rng = np.random.default_rng([seed, index])
+        send = target.session()
+        local = []
+        start_barrier.wait()
+        while take():
+            route = routes[rng.choice(len(routes), p=weights)]
+            form = route.form(rng) if route.form else None
+            start = time.perf_counter()
+            try:
+                status, body, _ = send(route.method, route.path, form)
+                size = len(body)
+                error = None
+            except Exception as e:
+                status, size, error = None, 0, f"{type(e).__name__}: {e}"
+            local.append((route.name, status, time.perf_counter() - start, size, error))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    if duration is not None:
+        deadline[0] = time.perf_counter() + duration
+    start = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def _route_stats(samples, elapsed):
+    latencies = np.array([seconds for _, _, seconds, _, _ in samples]) * 1000
+    sizes = np.array([size for _, _, _, size, _ in samples])
+    statuses = {}
+    errors = 0
+    for _, status, _, _, error in samples:
+        key = str(status) if status is not None else 'exception'
+        statuses[key] = statuses.get(key, 0) + 1
+        if error is not None or status >= 400:
+            errors += 1
+    return {
+        'requests': len(samples),
+        'throughput_rps': len(samples) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'error_rate': errors / len(samples),
+        'mean_bytes': float(sizes.mean()),
+        'status': statuses,
+    }
+
+
+def summarize(samples, elapsed):
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample[0], []).append(sample)
+    return {
+        'elapsed_s': elapsed,
+        'total': _route_stats(samples, elapsed) if samples else None,
+        'routes': {name: _route_stats(route_samples, elapsed) for name, route_samples in sorted(by_route.items())},
+        # Contoh pesan error (maks. 5) supaya kegagalan bisa langsung dicek
+        'errors': sorted({error for _, _, _, _, error in samples if error})[:5],
+    }
+
+
+def format_report(report, baseline=None):
+    lines = [f"{'route':<16}{'req':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'error':>8}"
+             f"{'bytes':>9}  status"]
+    rows = list(report['routes'].items()) + ([('TOTAL', report['total'])] if report['total'] else [])
+    for name, stats in rows:
+        statuses = ' '.join(f"{status}:{count}" for status, count in sorted(stats['status'].items()))
+        lines.append(f"{name:<16}{stats['requests']:>7}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+                     f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['error_rate']:>8.1%}"
+                     f"{stats['mean_bytes']:>9.0f}  {statuses}")
+        previous = _baseline_stats(baseline, name)
+        if previous:
+            # Perubahan relatif terhadap run sebelumnya (negatif = lebih cepat untuk latency)
+            lines.append(f"{'  vs baseline':<23}{_change(stats['throughput_rps'], previous['throughput_rps']):>9}"
+                         f"{_change(stats['p50_ms'], previous['p50_ms']):>9}"
+                         f"{_change(stats['p95_ms'], previous['p95_ms']):>9}"
+                         f"{_change(stats['p99_ms'], previous['p99_ms']):>9}")
+    for error in report['errors']:
+        lines.append(f"error: {error}")
+    return '\n'.join(lines)
+
+
+def _baseline_stats(baseline, name):
+    if not baseline:
+        return None
+    return baseline.get('total') if name == 'TOTAL' else baseline['routes'].get(name)
+
+
+def _change(value, previous):
+    if not previous:
+        return '-'
+    return f"{(value - previous) / previous:+.0%}"
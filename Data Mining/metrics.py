@@ -0,0 +1,252 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Batas bucket histogram durasi (detik), dari operasi cache sampai analisis berat
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Folder hasil cProfile per request (header X-Profile, cuma thread request, bukan job background)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '.cache/profiles')
+
+_current = threading.local()
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, value in key)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_max(self, value, **labels):
+        # High-water mark: cuma naik
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    result.append((f'{self.name}_bucket', key + (('le', _format_value(float(bound))),), cumulative))
+                result.append((f'{self.name}_sum', key, total))
+                result.append((f'{self.name}_count', key, cumulative))
+        return result
+
+
+class MetricsRegistry:
+    """Kumpulan metric in-process yang di-export dalam format teks Prometheus (/metrics).
+
+    Collector: fungsi tanpa argumen yang dipanggil tiap scrape untuk mengisi gauge dari state lain
+    (memori proses, stats batcher, dll).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation):
+        return self._add(Counter(name, documentation))
+
+    def gauge(self, name, documentation):
+        return self._add(Gauge(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, buckets))
+
+    def collector(self, func):
+        with self._lock:
+            self._collectors.append(func)
+        return func
+
+    def render(self):
+        for collect in list(self._collectors):
+            collect()
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, key, value in metric.samples():
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram('stage_duration_seconds', 'Durasi tiap tahap di dalam request / job.')
+STAGE_PEAK_GROWTH = registry.counter('stage_peak_rss_growth_bytes_total',
+                                     'Kenaikan peak RSS proses yang terjadi selama tahap ini berjalan.')
+CACHE_LOOKUPS = registry.counter('cache_lookups_total', 'Lookup ResultCache per hasil (memory, disk, miss).')
+MODEL_LOADS = registry.counter('model_loads_total', 'Artefak model yang di-load (start / file berubah).')
+PROCESS_RSS = registry.gauge('process_resident_memory_bytes', 'RSS proses saat ini.')
+PROCESS_PEAK_RSS = registry.gauge('process_peak_resident_memory_bytes', 'High-water mark RSS proses.')
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss: KB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+@registry.collector
+def collect_memory():
+    PROCESS_RSS.set(current_rss_bytes())
+    PROCESS_PEAK_RSS.set(peak_rss_bytes())
+
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    # Tahap yang jalan di request ini ikut dikirim di header Server-Timing
+    spans = getattr(_current, 'spans', None)
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage):
+    """Ukur durasi satu tahap (dan kenaikan peak RSS selama tahap itu); bisa dipakai sebagai decorator."""
+    peak = peak_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+        growth = peak_rss_bytes() - peak
+        if growth > 0:
+            STAGE_PEAK_GROWTH.inc(growth, stage=stage)
+
+
+def start_request_spans():
+    _current.spans = []
+
+
+def finish_request_spans():
+    spans, _current.spans = getattr(_current, 'spans', None) or [], None
+    return spans
+
+
+def server_timing(spans):
+    # Durasi per tahap (ms) yang dijumlah per nama, format header Server-Timing
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ', '.join(f"{re.sub(r'[^A-Za-z0-9.!#$%&*+^_`|~-]', '_', stage)};dur={seconds * 1000:.2f}"
+                     for stage, seconds in totals.items())
+
+
+# cProfile cuma bisa aktif satu per proses, request lain yang minta profile saat itu dilewati
+_profile_lock = threading.Lock()
+
+
+def start_profile():
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        _profile_lock.release()
+        return None
+    return profiler
+
+
+def stop_profile(profiler, label):
+    """Matikan profiler dan simpan hasilnya (.prof, buka dengan pstats / snakeviz); return path file."""
+    try:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'root'
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}.prof")
+        profiler.dump_stats(path)
+        return path
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import apriori, association_rules, fpgrowth
+from scipy import sparse
+
+
+ALGORITHMS = {'fpgrowth': fpgrowth, 'apriori': apriori}
+
+
+def build_item_matrix(frame, item_columns, prefixes=None):
+    """Transaksi -> matriks item sparse (CSR boolean), dibangun per kolom tanpa loop per baris.
+
+    prefixes: {kolom: prefix}, contoh {'Number of Apps Installed': 'Apps_'}. Nilai kosong (NaN) dilewati.
+    """
+    prefixes = prefixes or {}
+    rows, labels = [], []
+    for column in item_columns:
+        values = frame[column]
+        present = values.notna().to_numpy()
+        rows.append(np.flatnonzero(present))
+        labels.append((prefixes.get(column, '') + values[present].astype(str)).to_numpy(dtype=object))
+
+    rows = np.concatenate(rows)
+    codes, items = pd.factorize(np.concatenate(labels), sort=True)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, codes)),
+                               shape=(len(frame), len(items)), dtype=bool)
+    return matrix, list(items)
+
+
+def item_frame(matrix, items):
+    # DataFrame sparse boolean, format yang diterima fpgrowth/apriori mlxtend
+    return pd.DataFrame.sparse.from_spmatrix(matrix, columns=items).astype(pd.SparseDtype(bool, False))
+
+
+def mine_rules(onehot, min_support, min_confidence, algorithm='fpgrowth'):
+    itemsets = ALGORITHMS[algorithm](onehot, min_support=min_support, use_colnames=True)
+    if itemsets.empty:
+        return itemsets, pd.DataFrame(columns=['antecedents', 'consequents', 'support', 'confidence', 'lift'])
+    rules = association_rules(itemsets, metric="confidence", min_threshold=min_confidence,
+                              num_itemsets=len(itemsets))
+    return itemsets, rules
+
+
+def mine(onehot, min_support, min_confidence, algorithms=('fpgrowth', 'apriori'), mine_once=True):
+    """Return {algoritma: rules}.
+
+    mine_once=True: itemset frequent dari FP-Growth dan Apriori identik untuk min_support yang sama,
+    jadi cukup di-mining sekali (FP-Growth) dan rules-nya dipakai untuk semua view.
+    mine_once=False: tiap algoritma dijalankan paralel (thread pool) pada matriks item yang sama.
+    """
+    if mine_once:
+        _, rules = mine_rules(onehot, min_support, min_confidence, algorithm='fpgrowth')
+        return {algorithm: rules for algorithm in algorithms}
+
+    with ThreadPoolExecutor(max_workers=len(algorithms)) as executor:
+        futures = {algorithm: executor.submit(mine_rules, onehot, min_support, min_confidence, algorithm)
+                   for algorithm in algorithms}
+        return {algorithm: future.result()[1] for algorithm, future in futures.items()}
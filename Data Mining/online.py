@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+
+
+# Retrain penuh kalau rata-rata data baru bergeser lebih dari DRIFT_THRESHOLD standar deviasi training
+DRIFT_THRESHOLD = float(os.environ.get('DRIFT_THRESHOLD', 0.5))
+# Pergeseran baru dihitung setelah minimal sekian baris masuk (batch kecil terlalu noisy)
+DRIFT_MIN_ROWS = int(os.environ.get('DRIFT_MIN_ROWS', 50))
+
+
+def merge_moments(mean, std, n, X):
+    """Gabungkan mean/std (ddof=1) dari n baris lama dengan batch X, tanpa baris lama (Chan et al.)."""
+    X = np.asarray(X, dtype=np.float64)
+    m = len(X)
+    if m == 0:
+        return mean, std, n
+    batch_mean = X.mean(axis=0)
+    batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+    m2 = np.asarray(std, dtype=np.float64) ** 2 * max(n - 1, 0)
+
+    total = n + m
+    delta = batch_mean - mean
+    new_mean = mean + delta * m / total
+    new_m2 = m2 + batch_m2 + delta ** 2 * n * m / total
+    return new_mean, np.sqrt(new_m2 / max(total - 1, 1)), total
+
+
+class DriftMonitor:
+    """Rata-rata baris yang masuk sejak training terakhir dibandingkan dengan baseline training.
+
+    Skor per fitur = |mean baru - mean training| / std training; drift kalau skor maksimum
+    melewati threshold dan jumlah baris baru sudah cukup.
+    """
+
+    def __init__(self, features, mean, std):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.count = 0
+        self.sum = np.zeros(len(self.features))
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.count += len(X)
+        self.sum = self.sum + X.sum(axis=0)
+        return self
+
+    def scores(self):
+        if self.count == 0:
+            return np.zeros(len(self.features))
+        return np.abs(self.sum / self.count - self.mean) / np.where(self.std > 0, self.std, 1.0)
+
+    def drifted(self, threshold=DRIFT_THRESHOLD, min_rows=DRIFT_MIN_ROWS):
+        return self.count >= min_rows and float(self.scores().max()) > threshold
+
+    def report(self, threshold=DRIFT_THRESHOLD, min_rows=DRIFT_MIN_ROWS):
+        scores = self.scores()
+        return {
+            'rows_since_train': self.count,
+            'score': round(float(scores.max()), 4),
+            'threshold': threshold,
+            'min_rows': min_rows,
+            'features': {feature: round(float(score), 4) for feature, score in zip(self.features, scores)},
+            'drifted': self.drifted(threshold, min_rows),
+        }
+
+
+def fit_cluster_model(X, features, n_clusters=None, random_state=42, batch_size=1024, scaler=None,
+                      centroids=None, pca=None):
+    """Model cluster yang bisa di-update per batch dan dipakai untuk assign user baru.
+
+    scaler/centroids/pca: hasil fit /cluster (scaler 1-10, centroid KMeans, PCA untuk koordinat plot).
+    Kalau centroid diberikan, MiniBatchKMeans mulai dari centroid itu; satu langkah partial_fit dari
+    centroid KMeans yang sudah konvergen tidak menggeser centroid, cuma mengisi jumlah anggota per cluster.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.preprocessing import MinMaxScaler
+
+    X = np.asarray(X, dtype=np.float64)
+    if scaler is None:
+        scaler = MinMaxScaler(feature_range=(1, 10)).fit(X)
+    X_scaled = scaler.transform(X)
+    if centroids is None:
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, batch_size=batch_size, n_init=3)
+        model.fit(X_scaled)
+    else:
+        centroids = np.array(centroids, dtype=np.float64)
+        model = MiniBatchKMeans(n_clusters=len(centroids), init=centroids, n_init=1,
+                                random_state=random_state, batch_size=batch_size)
+        model.partial_fit(X_scaled)
+    return {
+        'scaler': scaler,
+        'model': model,
+        'centroids': np.array(model.cluster_centers_, dtype=np.float64),
+        'pca': pca,
+        'features': list(features),
+        'n': len(X),
+        'drift': DriftMonitor(features, X.mean(axis=0), X.std(axis=0, ddof=1)),
+    }
+
+
+def partial_fit_cluster_model(artifact, X):
+    # Range scaler diperluas dulu (partial_fit), baru centroid di-update dengan batch yang sudah di-scale
+    X = np.asarray(X, dtype=np.float64)
+    scaler, model = artifact['scaler'], artifact['model']
+    # Centroid ikut dipindah ke skala baru (lewat nilai aslinya), kalau tidak batch baru dibandingkan
+    # dengan centroid di skala lama dan user lama pindah cluster
+    centers = scaler.inverse_transform(model.cluster_centers_)
+    scaler.partial_fit(X)
+    model.cluster_centers_ = np.ascontiguousarray(scaler.transform(centers), dtype=np.float64)
+    model.partial_fit(scaler.transform(X))
+    artifact['centroids'] = np.array(artifact['model'].cluster_centers_, dtype=np.float64)
+    artifact['drift'].update(X)
+    artifact['n'] = artifact['n'] + len(X)
+    return artifact
+
+
+def scale_min_max(scaler, X):
+    # Sama dengan MinMaxScaler.transform, tanpa validasi input per panggilan
+    return X * scaler.scale_ + scaler.min_
+
+
+def assign_clusters(artifact, X):
+    """Assign batch X ke centroid terdekat; return (label, jarak, koordinat PCA (n, 2) atau None).
+
+    Jarak dihitung sekaligus lewat ||x||^2 - 2 x.c + ||c||^2 (satu perkalian matriks untuk seluruh batch).
+    """
+    X_scaled = scale_min_max(artifact['scaler'], np.asarray(X, dtype=np.float64))
+    centroids = np.asarray(artifact['centroids'], dtype=np.float64)
+
+    distances = (np.einsum('ij,ij->i', X_scaled, X_scaled)[:, None]
+                 - 2.0 * X_scaled @ centroids.T
+                 + np.einsum('ij,ij->i', centroids, centroids)[None, :])
+    labels = np.argmin(distances, axis=1)
+    nearest = np.sqrt(np.maximum(distances[np.arange(len(labels)), labels], 0.0))
+
+    coordinates = None
+    pca = artifact.get('pca')
+    if pca is not None:
+        # PCA /cluster di-fit pada fitur ter-scale + kolom label cluster, jadi label ikut diproyeksikan
+        features = np.column_stack([X_scaled, labels])
+        coordinates = (features - pca.mean_) @ pca.components_.T
+    return labels, nearest, coordinates
+
+
+def update_anomaly_baseline(artifact, X, n=None):
+    # IsolationForest-nya tetap; yang di-update baseline mean/std untuk penjelasan z-score
+    n = artifact.get('n', n)
+    artifact['mean'], artifact['std'], artifact['n'] = merge_moments(artifact['mean'], artifact['std'], n, X)
+    return artifact
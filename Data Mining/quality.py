@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score
+from sklearn.metrics.pairwise import euclidean_distances
+
+
+# Di atas jumlah baris ini silhouette dihitung dari sampel (mode 'auto')
+EXACT_MAX_ROWS = 20000
+# Ukuran maksimum satu blok matriks jarak (byte) saat menghitung silhouette
+SILHOUETTE_BLOCK_BYTES = int(os.environ.get('SILHOUETTE_BLOCK_BYTES', 64 * 2 ** 20))
+
+
+def silhouette_samples_chunked(X, labels, rows=None, chunk_size=1024, block_bytes=SILHOUETTE_BLOCK_BYTES):
+    """Silhouette per baris, jarak pairwise dihitung per blok (baris query x baris referensi).
+
+    rows: index baris yang mau dihitung (default semua), jarak tetap ke seluruh data.
+    Blok jarak paling besar block_bytes, jadi memori tambahan tidak ikut naik dengan jumlah baris;
+    jumlah jarak per cluster diakumulasi per blok referensi.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    _, labels = np.unique(labels, return_inverse=True)
+    n_clusters = labels.max() + 1
+    counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+    if rows is None:
+        rows = np.arange(len(X))
+
+    chunk_size = max(1, min(chunk_size, block_bytes // 8))
+    block_rows = max(1, block_bytes // (8 * chunk_size))
+    clusters = np.arange(n_clusters)
+
+    scores = np.empty(len(rows))
+    for start in range(0, len(rows), chunk_size):
+        idx = rows[start:start + chunk_size]
+        cluster_sums = np.zeros((len(idx), n_clusters))
+        for ref_start in range(0, len(X), block_rows):
+            ref_labels = labels[ref_start:ref_start + block_rows]
+            # One-hot cluster cuma untuk blok ini (block_rows x k)
+            onehot = (ref_labels[:, None] == clusters).astype(np.float64)
+            cluster_sums += euclidean_distances(X[idx], X[ref_start:ref_start + block_rows]) @ onehot
+        own = labels[idx]
+        own_count = counts[own] - 1
+
+        a = np.divide(cluster_sums[np.arange(len(idx)), own], own_count,
+                      out=np.zeros(len(idx)), where=own_count > 0)
+        mean_other = cluster_sums / counts
+        mean_other[np.arange(len(idx)), own] = np.inf
+        b = mean_other.min(axis=1)
+
+        s = (b - a) / np.maximum(a, b)
+        # Konvensi sklearn: cluster isi 1 titik -> silhouette 0
+        scores[start:start + len(idx)] = np.where(own_count > 0, np.nan_to_num(s), 0.0)
+    return scores
+
+
+def silhouette_exact(X, labels, chunk_size=1024):
+    return float(silhouette_samples_chunked(X, labels, chunk_size=chunk_size).mean())
+
+
+def silhouette_approx(X, labels, sample_size=5000, confidence=0.95, random_state=42, chunk_size=1024):
+    # Rata-rata silhouette dari sampel baris (jarak tetap ke seluruh data) + confidence interval normal
+    n_rows = len(X)
+    sample_size = min(sample_size, n_rows)
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+
+    scores = silhouette_samples_chunked(X, labels, rows=rows, chunk_size=chunk_size)
+    mean = float(scores.mean())
+    # Koreksi finite population karena sampling tanpa pengembalian
+    fpc = np.sqrt((n_rows - sample_size) / (n_rows - 1)) if n_rows > 1 else 0.0
+    stderr = scores.std(ddof=1) / np.sqrt(sample_size) * fpc if sample_size > 1 else 0.0
+    margin = float(norm.ppf(0.5 + confidence / 2) * stderr)
+    return mean, (mean - margin, mean + margin)
+
+
+def cluster_quality(X, labels, mode='auto', sample_size=5000, confidence=0.95,
+                    random_state=42, chunk_size=1024):
+    """Silhouette (exact / approx) + Davies-Bouldin dan Calinski-Harabasz (linear time)."""
+    X = np.asarray(X, dtype=np.float64)
+    if mode == 'auto':
+        mode = 'exact' if len(X) <= EXACT_MAX_ROWS else 'approx'
+
+    if mode == 'exact':
+        silhouette = silhouette_exact(X, labels, chunk_size=chunk_size)
+        interval = (silhouette, silhouette)
+    else:
+        silhouette, interval = silhouette_approx(X, labels, sample_size=sample_size, confidence=confidence,
+                                                 random_state=random_state, chunk_size=chunk_size)
+
+    return {
+        'mode': mode,
+        'silhouette': silhouette,
+        'silhouette_ci': interval,
+        'confidence': confidence if mode == 'approx' else 1.0,
+        'davies_bouldin': float(davies_bouldin_score(X, labels)),
+        'calinski_harabasz': float(calinski_harabasz_score(X, labels)),
+    }
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+import uuid
+
+from metrics import MODEL_LOADS, span
+
+
+class ModelNotFound(FileNotFoundError):
+    pass
+
+
+def new_version():
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class ModelRegistry:
+    """Menyimpan model hasil training di memori dan reload otomatis kalau file artefaknya berubah.
+
+    mmap_mode='r': array numpy di dalam artefak (centroid KMeans, statistik scaler) di-memory-map.
+    Node tree sklearn selalu di-copy waktu unpickle, jadi forest yang dipakai tiap request
+    di-export ke .npz (trees.save_packed) dan di-load lewat loader supaya semua worker berbagi
+    halaman memori yang sama.
+    """
+
+    def __init__(self, mmap_mode='r'):
+        self.mmap_mode = mmap_mode
+        self._paths = {}
+        self._loaders = {}
+        self._loaded = {}  # name -> (signature file, artefak)
+        self._versions = {}  # name -> (signature file .version, versi)
+        self._lock = threading.Lock()
+
+    def register(self, name, path, loader=None):
+        # loader: fungsi path -> artefak untuk format selain joblib (mis. forest .npz), read-only
+        with self._lock:
+            self._paths[name] = path
+            if loader is not None:
+                self._loaders[name] = loader
+
+    def path(self, name):
+        return self._paths[name]
+
+    def save(self, name, artifact):
+        import joblib
+
+        # Setiap artefak punya versi sendiri supaya client bisa tahu model mana yang dipakai
+        artifact = dict(artifact)
+        artifact.setdefault('version', new_version())
+        path = self._paths[name]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)
+        # Versi juga ditulis ke file kecil di sampingnya, supaya bisa dicek tanpa load artefak
+        with open(tmp_path, 'w') as f:
+            f.write(artifact['version'])
+        os.replace(tmp_path, f"{path}.version")
+        return artifact
+
+    def get(self, name):
+        path = self._paths[name]
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ModelNotFound(f"Model '{name}' belum di-training ({path} tidak ada), jalankan `flask train`")
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        loaded = self._loaded.get(name)
+        if loaded and loaded[0] == signature:
+            return loaded[1]
+
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded and loaded[0] == signature:
+                return loaded[1]
+            with span('model_load'):
+                if name in self._loaders:
+                    artifact = self._loaders[name](path)
+                else:
+                    import joblib
+
+                    artifact = joblib.load(path, mmap_mode=self.mmap_mode)
+            MODEL_LOADS.inc(model=name)
+            self._loaded[name] = (signature, artifact)
+            print(f"Model '{name}' loaded (version {artifact.get('version')})")
+            return artifact
+
+    def version(self, name):
+        # Dari file .version kalau ada (mis. cek forest .npz vs model.pkl tanpa unpickle model sklearn).
+        # Di-cache per signature file seperti get(); inode ikut dicek karena save() selalu os.replace
+        # file baru, dan isi versi selalu sama panjang
+        path = f"{self._paths[name]}.version"
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self.get(name).get('version')
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._versions.get(name)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(path) as f:
+            version = f.read().strip()
+        self._versions[name] = (signature, version)
+        return version
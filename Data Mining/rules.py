@@ -0,0 +1,76 @@
+import numpy as np
+
+
+SORT_KEYS = ('lift', 'confidence', 'support')
+
+
+class RuleStore:
+    """Rules hasil association_rules yang sudah di-index per item antecedent/consequent
+    dan sudah diurutkan per lift/confidence/support, jadi query cukup ambil potongan yang perlu."""
+
+    def __init__(self, rules):
+        self.frame = rules
+        self.antecedents = [tuple(sorted(map(str, items))) for items in rules['antecedents']]
+        self.consequents = [tuple(sorted(map(str, items))) for items in rules['consequents']]
+        self.metrics = {key: rules[key].to_numpy(dtype=np.float64) for key in SORT_KEYS}
+
+        # Urutan descending per metrik + rank tiap rule (dipakai untuk mengurutkan hasil filter)
+        self.order = {key: np.argsort(-values, kind='stable') for key, values in self.metrics.items()}
+        self.rank = {}
+        for key, order in self.order.items():
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self.rank[key] = rank
+
+        # Inverted index: item -> id rule (terurut)
+        self.by_antecedent = self._index(self.antecedents)
+        self.by_consequent = self._index(self.consequents)
+
+    @staticmethod
+    def _index(itemsets):
+        index = {}
+        for rule_id, items in enumerate(itemsets):
+            for item in items:
+                index.setdefault(item, []).append(rule_id)
+        return {item: np.asarray(ids, dtype=np.int64) for item, ids in index.items()}
+
+    def __len__(self):
+        return len(self.antecedents)
+
+    def query(self, antecedent=None, consequent=None, sort='lift', min_support=0.0, min_confidence=0.0,
+              min_lift=0.0, offset=0, limit=20):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort harus salah satu dari {', '.join(SORT_KEYS)}")
+
+        ids = None
+        for item, index in ((antecedent, self.by_antecedent), (consequent, self.by_consequent)):
+            if item is None:
+                continue
+            postings = index.get(item, np.empty(0, dtype=np.int64))
+            ids = postings if ids is None else np.intersect1d(ids, postings, assume_unique=True)
+
+        filtered = min_support > 0 or min_confidence > 0 or min_lift > 0
+        if ids is None and not filtered:
+            # Tanpa filter: langsung potong dari urutan yang sudah ada
+            total = len(self)
+            page = self.order[sort][offset:offset + limit]
+        else:
+            if ids is None:
+                ids = np.arange(len(self))
+            keep = ((self.metrics['support'][ids] >= min_support)
+                    & (self.metrics['confidence'][ids] >= min_confidence)
+                    & (self.metrics['lift'][ids] >= min_lift))
+            ids = ids[keep]
+            total = len(ids)
+            page = ids[np.argsort(self.rank[sort][ids], kind='stable')][offset:offset + limit]
+
+        return total, [self.rule(rule_id) for rule_id in page]
+
+    def rule(self, rule_id):
+        return {
+            'antecedents': list(self.antecedents[rule_id]),
+            'consequents': list(self.consequents[rule_id]),
+            'support': float(self.metrics['support'][rule_id]),
+            'confidence': float(self.metrics['confidence'][rule_id]),
+            'lift': float(self.metrics['lift'][rule_id]),
+        }
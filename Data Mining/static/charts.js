@@ -0,0 +1,168 @@
+// Render chart dari data JSON /api/charts/<route> (spec yang sama dengan fallback PNG di server)
+(function () {
+    const PALETTE = ['#8000ff', '#2c7ef7', '#2adddd', '#80ffb4', '#d4dd80', '#ff964f', '#ff0000',
+                     '#6f42c1', '#20c997', '#fd7e14'];
+
+    function color(i, n) {
+        return PALETTE[Math.floor(i * PALETTE.length / Math.max(n, 1)) % PALETTE.length];
+    }
+
+    function esc(text) {
+        const div = document.createElement('div');
+        div.textContent = String(text);
+        return div.innerHTML;
+    }
+
+    function axes(spec) {
+        return {
+            x: {title: {display: !!spec.xlabel, text: spec.xlabel}},
+            y: {title: {display: !!spec.ylabel, text: spec.ylabel}}
+        };
+    }
+
+    function options(spec, extra) {
+        return Object.assign({
+            animation: false,
+            plugins: {title: {display: !!spec.title, text: spec.title}},
+            scales: axes(spec)
+        }, extra || {});
+    }
+
+    function canvas(el) {
+        const c = document.createElement('canvas');
+        el.appendChild(c);
+        return c;
+    }
+
+    function line(el, spec) {
+        new Chart(canvas(el), {
+            type: 'line',
+            data: {labels: spec.x, datasets: [{data: spec.y, borderDash: [6, 4], label: spec.ylabel}]},
+            options: options(spec)
+        });
+    }
+
+    function groupedScatter(el, spec, keys, labelOf) {
+        const groups = {};
+        keys.forEach((key, i) => {
+            (groups[key] = groups[key] || []).push({x: spec.x[i], y: spec.y[i]});
+        });
+        const names = Object.keys(groups);
+        new Chart(canvas(el), {
+            type: 'scatter',
+            data: {
+                datasets: names.map((name, i) => ({
+                    label: labelOf(name), data: groups[name], backgroundColor: color(i, names.length)
+                }))
+            },
+            options: options(spec)
+        });
+    }
+
+    function bar(el, spec) {
+        new Chart(canvas(el), {
+            type: 'bar',
+            data: {
+                labels: spec.labels,
+                datasets: [{
+                    data: spec.values, label: spec.horizontal ? spec.xlabel : spec.ylabel,
+                    backgroundColor: spec.labels.map((_, i) => color(i, spec.labels.length))
+                }]
+            },
+            options: options(spec, {indexAxis: spec.horizontal ? 'y' : 'x'})
+        });
+    }
+
+    function box(el, spec) {
+        const labels = spec.stats.map(s => s.label);
+        new Chart(canvas(el), {
+            type: 'bar',
+            data: {
+                labels: labels,
+                datasets: [
+                    {label: 'Whisker', data: spec.stats.map(s => [s.whislo, s.whishi]),
+                     backgroundColor: '#6c757d', barPercentage: 0.1, grouped: false},
+                    {label: 'Q1 - Q3', data: spec.stats.map(s => [s.q1, s.q3]),
+                     backgroundColor: spec.stats.map((_, i) => color(i, labels.length)), grouped: false},
+                    {label: 'Median', type: 'scatter', data: spec.stats.map(s => ({x: s.label, y: s.med})),
+                     pointStyle: 'line', pointRadius: 12, borderColor: '#000'}
+                ]
+            },
+            options: options(spec)
+        });
+    }
+
+    function heatmap(el, spec) {
+        const flat = [].concat(...spec.values);
+        const max = Math.max(...flat, 1e-9);
+        const digits = spec.fmt === 'd' ? 0 : 2;
+        let html = '<h6>' + esc(spec.title) + '</h6><div class="table-responsive"><table class="table table-sm table-bordered">';
+        html += '<thead><tr><th>' + esc(spec.ylabel || '') + ' \\ ' + esc(spec.xlabel || '') + '</th>';
+        spec.columns.forEach(c => { html += '<th>' + esc(c) + '</th>'; });
+        html += '</tr></thead><tbody>';
+        spec.values.forEach((row, i) => {
+            html += '<tr><th>' + esc(spec.rows[i]) + '</th>';
+            row.forEach(v => {
+                const alpha = (v / max).toFixed(2);
+                html += '<td style="background: rgba(220, 53, 69, ' + alpha + ')">' + v.toFixed(digits) + '</td>';
+            });
+            html += '</tr>';
+        });
+        el.innerHTML = html + '</tbody></table></div>';
+    }
+
+    function graph(el, spec) {
+        let html = '<h6>' + esc(spec.title) + '</h6><table class="table table-sm table-striped">' +
+                   '<thead><tr><th>Antecedent</th><th></th><th>Consequents</th><th>Confidence</th></tr></thead><tbody>';
+        spec.edges.forEach(e => {
+            html += '<tr><td>' + esc(e[0]) + '</td><td>&rarr;</td><td>' + esc(e[1]) + '</td><td>' + e[2].toFixed(2) + '</td></tr>';
+        });
+        el.innerHTML = html + '</tbody></table>';
+    }
+
+    const RENDERERS = {
+        line: line,
+        scatter: (el, spec) => groupedScatter(el, spec, spec.labels, name => 'Cluster ' + name),
+        hue_scatter: (el, spec) => groupedScatter(el, spec, spec.hue, name => name),
+        bar: bar,
+        box: box,
+        heatmap: heatmap,
+        graph: graph
+    };
+
+    // 202 = data chart masih dihitung di job queue; tunggu job selesai lalu minta ulang
+    function waitForJob(statusUrl) {
+        return new Promise(resolve => setTimeout(resolve, 1000))
+            .then(() => fetch(statusUrl))
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'failed' || job.error) {
+                    throw new Error(job.error);
+                }
+                return job.status === 'done' ? null : waitForJob(statusUrl);
+            });
+    }
+
+    function load(url) {
+        return fetch(url).then(response => {
+            if (response.status !== 202) {
+                return response.json();
+            }
+            return response.json()
+                .then(payload => waitForJob(payload.status_url))
+                .then(() => load(url));
+        });
+    }
+
+    document.querySelectorAll('[data-chart-source]').forEach(source => {
+        load(source.dataset.chartSource + window.location.search)
+            .then(payload => {
+                document.querySelectorAll('[data-chart]').forEach(el => {
+                    const spec = payload.charts[el.dataset.chart];
+                    if (spec) {
+                        RENDERERS[spec.type](el, spec);
+                    }
+                });
+            });
+    });
+})();
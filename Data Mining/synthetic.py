@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from dataset import CATEGORICAL_COLUMNS
+
+
+CLASS_COLUMN = 'User Behavior Class'
+ID_COLUMN = 'User ID'
+
+
+def fit_synthetic(frame, class_column=CLASS_COLUMN, id_column=ID_COLUMN):
+    """Ringkasan dataset untuk generator sintetis, dipisah per kelas (User Behavior Class).
+
+    Per kelas: proporsi kombinasi kategori (Device Model + OS + Gender, jadi pasangan iPhone/iOS tetap
+    konsisten) dan Gaussian copula untuk kolom numerik: nilai terurut (marginal empiris) + korelasi
+    normal score antar kolom. Korelasi antar kelas ikut terjaga karena kelas di-sampling sesuai proporsinya.
+    """
+    from scipy.special import ndtri
+
+    categorical = [column for column in CATEGORICAL_COLUMNS if column in frame.columns]
+    numeric = [column for column in frame.columns
+               if column not in categorical and column not in (class_column, id_column)]
+
+    classes = []
+    for label, rows in frame.groupby(class_column, observed=True):
+        combos = rows[categorical].astype(str).value_counts(normalize=True, sort=False)
+        values = rows[numeric].to_numpy(dtype=np.float64)
+        # Normal score dari rank (tie dipecah berdasarkan urutan), lalu korelasinya
+        ranks = values.argsort(axis=0, kind='stable').argsort(axis=0, kind='stable')
+        scores = ndtri((ranks + 0.5) / len(rows))
+        correlation = np.corrcoef(scores, rowvar=False) if len(rows) > 1 else np.eye(len(numeric))
+        classes.append({
+            'label': label,
+            'weight': len(rows) / len(frame),
+            'combos': [list(combo) for combo in combos.index],
+            'combo_weights': combos.to_numpy(dtype=np.float64),
+            'sorted': np.sort(values, axis=0),
+            'correlation': np.nan_to_num(correlation),
+        })
+
+    return {
+        'columns': list(frame.columns),
+        'categorical': categorical,
+        'numeric': numeric,
+        'class_column': class_column,
+        'id_column': id_column,
+        'decimals': {column: _decimals(frame[column]) for column in numeric},
+        'classes': classes,
+    }
+
+
+def _decimals(values, max_decimals=3):
+    # Jumlah angka di belakang koma yang dipakai kolom ini (0 = integer)
+    values = values.to_numpy(dtype=np.float64)
+    for decimals in range(max_decimals + 1):
+        if np.allclose(values, np.round(values, decimals)):
+            return decimals
+    return max_decimals
+
+
+def _sample_class(spec_class, n_rows, rng):
+    from scipy.special import ndtr
+
+    combos = np.array(spec_class['combos'], dtype=object)
+    picks = rng.choice(len(combos), size=n_rows, p=spec_class['combo_weights'])
+
+    sorted_values = spec_class['sorted']
+    n_columns = sorted_values.shape[1]
+    # Copula: normal berkorelasi -> uniform -> kuantil empiris tiap kolom (interpolasi linear)
+    chol = np.linalg.cholesky(spec_class['correlation'] + np.eye(n_columns) * 1e-9)
+    uniform = ndtr(rng.standard_normal((n_rows, n_columns)) @ chol.T)
+    grid = (np.arange(len(sorted_values)) + 0.5) / len(sorted_values)
+    numeric = np.column_stack([np.interp(uniform[:, j], grid, sorted_values[:, j]) for j in range(n_columns)])
+    return combos[picks], numeric
+
+
+def generate_synthetic(spec, n_rows, seed=0, start_id=1):
+    """DataFrame sintetis n_rows baris dengan kolom, urutan dan tipe yang sama dengan dataset asli."""
+    rng = np.random.default_rng(seed)
+    classes = spec['classes']
+    counts = rng.multinomial(n_rows, [spec_class['weight'] for spec_class in classes])
+
+    categorical, numeric, labels = [], [], []
+    for spec_class, count in zip(classes, counts):
+        if count == 0:
+            continue
+        combos, values = _sample_class(spec_class, count, rng)
+        categorical.append(combos)
+        numeric.append(values)
+        labels.append(np.full(count, spec_class['label']))
+
+    # Urutan kelas diacak supaya tiap chunk / potongan data punya campuran kelas yang sama
+    order = rng.permutation(n_rows)
+    categorical = np.concatenate(categorical)[order] if categorical else np.empty((0, len(spec['categorical'])))
+    numeric = np.concatenate(numeric)[order] if numeric else np.empty((0, len(spec['numeric'])))
+    labels = np.concatenate(labels)[order] if labels else np.empty(0, dtype=np.int64)
+
+    columns = {spec['id_column']: np.arange(start_id, start_id + n_rows, dtype=np.int64),
+               spec['class_column']: labels.astype(np.int64)}
+    for j, column in enumerate(spec['categorical']):
+        columns[column] = pd.Categorical(categorical[:, j].astype(str))
+    for j, column in enumerate(spec['numeric']):
+        decimals = spec['decimals'][column]
+        values = np.round(numeric[:, j], decimals)
+        columns[column] = values.astype(np.int64) if decimals == 0 else values
+    return pd.DataFrame({column: columns[column] for column in spec['columns']})
+
+
+def iter_synthetic(spec, n_rows, seed=0, chunksize=1000000):
+    # Dataset besar (mis. 10^7 baris) dibuat per chunk dengan seed turunan, jadi memori tetap kecil
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-n_rows // chunksize)))
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunksize
+        size = min(chunksize, n_rows - start)
+        if size <= 0:
+            break
+        yield generate_synthetic(spec, size, seed=chunk_seed, start_id=start + 1)
+
+
+def write_synthetic_csv(path, spec, n_rows, seed=0, chunksize=1000000):
+    for i, chunk in enumerate(iter_synthetic(spec, n_rows, seed, chunksize)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return path
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest, RandomForestRegressor
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+from trees import (SMALL_BATCH, apply_tree, compile_tree, decision_isolation_forest, load_packed, pack_forest,
+                   pack_isolation_forest, predict_forest, predict_tree, predict_tree_proba, save_packed)
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    # Titik di luar range training + nilai tepat di threshold ikut dicek
+    X_test = np.vstack([rng.normal(scale=2.0, size=(300, 5)), X[:50]])
+    return X, X_test
+
+
+def with_nan(X, seed=1):
+    # Satu NaN per baris di kolom acak, arah NaN di tiap split harus sama dengan sklearn
+    X = X.copy()
+    X[np.arange(len(X)), np.random.default_rng(seed).integers(0, X.shape[1], len(X))] = np.nan
+    return X
+
+
+@pytest.mark.parametrize('n_rows', [1, SMALL_BATCH, SMALL_BATCH + 1, 350])
+def test_apply_tree_matches_sklearn(data, n_rows):
+    X, X_test = data
+    y = (X[:, 0] + X[:, 1] ** 2 > 0.5).astype(int) + (X[:, 2] > 1)
+    model = DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y)
+    table = compile_tree(model)
+
+    rows = X_test[:n_rows]
+    np.testing.assert_array_equal(apply_tree(table, rows), model.apply(rows.astype(np.float32)))
+    np.testing.assert_array_equal(predict_tree(table, rows), model.predict(rows))
+    np.testing.assert_allclose(predict_tree_proba(table, rows), model.predict_proba(rows))
+    rows = with_nan(rows)
+    np.testing.assert_array_equal(apply_tree(table, rows), model.apply(rows.astype(np.float32)))
+
+
+def test_predict_tree_regressor(data):
+    X, X_test = data
+    model = DecisionTreeRegressor(max_depth=5, random_state=0).fit(X, X[:, 0] * 3 - X[:, 1])
+    np.testing.assert_array_equal(predict_tree(compile_tree(model), X_test), model.predict(X_test))
+
+
+@pytest.mark.parametrize('n_rows', [1, 2, 350])
+def test_predict_forest_identical_to_sklearn(data, n_rows):
+    X, X_test = data
+    model = RandomForestRegressor(n_estimators=30, random_state=0).fit(X, X[:, 0] + np.sin(X[:, 1]))
+    rows = X_test[:n_rows]
+    packed = pack_forest(model)
+    np.testing.assert_array_equal(predict_forest(packed, rows), model.predict(rows))
+    np.testing.assert_array_equal(predict_forest(packed, with_nan(rows)), model.predict(with_nan(rows)))
+
+
+@pytest.mark.parametrize('params', [{}, {'max_features': 3}, {'max_samples': 64}])
+@pytest.mark.parametrize('n_rows', [1, 350])
+def test_isolation_forest_identical_to_sklearn(data, params, n_rows):
+    X, X_test = data
+    model = IsolationForest(n_estimators=50, contamination=0.05, random_state=0, **params).fit(X)
+    rows = X_test[:n_rows]
+    packed = pack_isolation_forest(model)
+    np.testing.assert_array_equal(decision_isolation_forest(packed, rows), model.decision_function(rows))
+    np.testing.assert_array_equal(decision_isolation_forest(packed, with_nan(rows)),
+                                  model.decision_function(with_nan(rows)))
+
+
+def test_packed_roundtrip_is_memory_mapped(data, tmp_path):
+    X, X_test = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, X[:, 0])
+    packed = pack_forest(model)
+    packed['version'] = np.asarray('v1')
+    path = str(tmp_path / 'forest.npz')
+    save_packed(path, packed)
+
+    loaded = load_packed(path)
+    assert str(loaded['version']) == 'v1'
+    assert not loaded['left'].flags.writeable
+    np.testing.assert_array_equal(predict_forest(loaded, X_test), model.predict(X_test))
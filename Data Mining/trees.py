@@ -0,0 +1,292 @@
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+
+# Node daun di tabel: feature = -1 (sama seperti children_left sklearn untuk daun)
+LEAF = -1
+
+# Sampai jumlah baris ini tree di-walk per baris, di atasnya per level untuk semua baris
+SMALL_BATCH = 8
+
+
+def compile_tree(estimator):
+    """DecisionTree sklearn -> tabel node datar (array numpy) yang bisa di-walk tanpa sklearn.
+
+    feature/threshold/left/right per node; value = output per node (proba kelas untuk classifier,
+    nilai prediksi untuk regressor). missing_left: arah nilai NaN di tiap split (missing_go_to_left sklearn).
+    """
+    tree = estimator.tree_
+    is_leaf = tree.children_left == -1
+    value = np.asarray(tree.value[:, :, :], dtype=np.float64)
+    if hasattr(estimator, 'classes_'):
+        # Classifier: value = proporsi sampel tiap kelas di node
+        value = value[:, 0, :]
+        value = value / value.sum(axis=1, keepdims=True)
+    else:
+        value = value[:, 0, 0]
+    return {
+        'feature': np.where(is_leaf, LEAF, tree.feature).astype(np.int32),
+        'threshold': tree.threshold.astype(np.float64),
+        'left': tree.children_left.astype(np.int32),
+        'right': tree.children_right.astype(np.int32),
+        'missing_left': _missing_go_to_left(tree),
+        'value': value,
+        'depth': int(tree.max_depth),
+        'classes': np.asarray(getattr(estimator, 'classes_', [])),
+        'n_features': int(estimator.n_features_in_),
+    }
+
+
+def _missing_go_to_left(tree):
+    # sklearn < 1.3 belum punya routing missing value: NaN selalu ke kanan (NaN <= threshold = False)
+    missing = getattr(tree, 'missing_go_to_left', None)
+    return np.zeros(tree.node_count, dtype=bool) if missing is None else np.asarray(missing, dtype=bool)
+
+
+def apply_tree(table, X, root=0):
+    """Index node daun untuk tiap baris X.
+
+    X di-cast ke float32 dulu seperti sklearn, jadi perbandingan dengan threshold identik.
+    Batch kecil di-walk per baris (tanpa overhead operasi array), batch besar turun satu level
+    per iterasi untuk semua baris sekaligus (vectorized).
+    """
+    X = np.asarray(X, dtype=np.float32)
+    if len(X) <= SMALL_BATCH:
+        return np.array([walk_row(table, row, root) for row in X], dtype=np.int64)
+
+    feature, threshold, left, right = table['feature'], table['threshold'], table['left'], table['right']
+    missing_left = table['missing_left'] if np.isnan(X).any() else None
+    rows = np.arange(len(X))
+    node = np.full(len(X), root, dtype=np.int64)
+    for _ in range(table['depth']):
+        split = feature[node]
+        values = X[rows, split]
+        go_left = values <= threshold[node]
+        if missing_left is not None:
+            go_left |= np.isnan(values) & missing_left[node]
+        # Baris yang sudah di daun tetap di tempat (feature daun = -1 cuma menunjuk kolom terakhir)
+        node = np.where(split == LEAF, node, np.where(go_left, left[node], right[node]))
+    return node
+
+
+def walk_row(table, row, node=0):
+    feature, threshold, left, right = table['feature'], table['threshold'], table['left'], table['right']
+    split = feature[node]
+    while split != LEAF:
+        value = row[split]
+        if value != value:
+            node = left[node] if table['missing_left'][node] else right[node]
+        else:
+            node = left[node] if value <= threshold[node] else right[node]
+        split = feature[node]
+    return node
+
+
+def predict_tree_proba(table, X):
+    return table['value'][apply_tree(table, X)]
+
+
+def predict_tree(table, X):
+    value = table['value'][apply_tree(table, X)]
+    if value.ndim == 1:
+        return value
+    return table['classes'][np.argmax(value, axis=1)]
+
+
+# Versi format .npz hasil pack; file format lain ditolak load_forest (export / train ulang)
+PACKED_FORMAT = 2
+
+
+# Forest di-pack jadi beberapa array kontigu (semua tree disambung, index node global).
+# Node diurutkan ulang per level (BFS) supaya anak kanan selalu = anak kiri + 1, jadi turun satu
+# level cukup `node = left[node] + (x > threshold)`. Daun menunjuk ke dirinya sendiri dengan
+# threshold +inf (tidak pernah ke kanan), jadi semua baris x tree bisa turun `depth` level tanpa
+# cek daun. missing_right: split yang mengirim NaN ke kanan (seperti sklearn).
+def _pack_trees(estimators, leaf_values, estimator_features=None):
+    features, thresholds, lefts, missing_right, values, roots = [], [], [], [], [], []
+    offset = 0
+    for i, (estimator, value) in enumerate(zip(estimators, leaf_values)):
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        order = _sibling_order(tree.children_left, tree.children_right)
+        new_id = np.empty(tree.node_count, dtype=np.int64)
+        new_id[order] = np.arange(tree.node_count)
+        leaf = is_leaf[order]
+        feature = np.where(is_leaf, 0, tree.feature)
+        if estimator_features is not None:
+            # Tree yang di-fit pada subset kolom: index fitur dikembalikan ke kolom X asli
+            feature = np.asarray(estimator_features[i])[feature]
+
+        features.append(feature[order])
+        thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+        lefts.append(np.where(leaf, np.arange(tree.node_count), new_id[tree.children_left[order]]) + offset)
+        missing_right.append(~_missing_go_to_left(tree)[order] & ~leaf)
+        values.append(np.asarray(value)[order])
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        # Index int64 (= intp): dipakai langsung untuk fancy indexing tanpa konversi tiap level
+        'feature': np.concatenate(features).astype(np.int64),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int64),
+        'missing_right': np.concatenate(missing_right),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int64),
+        'depth': np.asarray(max(estimator.tree_.max_depth for estimator in estimators), dtype=np.int32),
+        'format': np.asarray(PACKED_FORMAT, dtype=np.int32),
+    }
+
+
+def _sibling_order(children_left, children_right):
+    # Urutan node BFS (root = 0), anak kiri & kanan tiap node selalu bersebelahan
+    order = [np.array([0])]
+    frontier = order[0]
+    while len(frontier):
+        internal = frontier[children_left[frontier] != -1]
+        frontier = np.column_stack([children_left[internal], children_right[internal]]).reshape(-1)
+        order.append(frontier)
+    return np.concatenate(order)
+
+
+def pack_forest(forest):
+    """RandomForestRegressor sklearn -> dict array numpy (feature, threshold, left, value, roots, depth)."""
+    return _pack_trees(forest.estimators_, [estimator.tree_.value[:, 0, 0] for estimator in forest.estimators_])
+
+
+def pack_isolation_forest(forest):
+    """IsolationForest sklearn -> array dengan format yang sama dengan pack_forest.
+
+    value daun = panjang path ke daun + rata-rata path sisa sampel di daun - 1 (sama seperti
+    IsolationForest._compute_score_samples), ditambah konstanta normalisasi dan offset_.
+    """
+    leaf_values = [np.asarray(lengths, dtype=np.float64) + np.asarray(average, dtype=np.float64) - 1.0
+                   for lengths, average in zip(forest._decision_path_lengths, forest._average_path_length_per_tree)]
+    packed = _pack_trees(forest.estimators_, leaf_values, forest.estimators_features_)
+    packed['path_norm'] = np.asarray(len(forest.estimators_) * _average_path_length(forest._max_samples))
+    packed['offset'] = np.asarray(forest.offset_, dtype=np.float64)
+    return packed
+
+
+def _average_path_length(n):
+    # Rata-rata panjang path pencarian gagal di BST dengan n sampel (c(n) di paper Isolation Forest)
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+
+
+def save_packed(path, arrays):
+    # .npz tanpa kompresi (ZIP_STORED), supaya tiap array bisa di-memory-map langsung dari file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_packed(path):
+    """Buka .npz hasil save_packed sebagai dict np.memmap read-only (tanpa baca seluruh file ke memori)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} terkompresi, tidak bisa di-memory-map")
+            # Local file header: 30 byte + nama file + extra field, setelah itu isi file .npy
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len('.npy')]
+            if dtype.kind in 'US' or not shape:
+                # Skalar / string kecil (mis. versi) cukup dibaca biasa
+                arrays[name] = np.lib.format.read_array(archive.open(info))
+                continue
+            mapped = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                               order='F' if fortran_order else 'C')
+            # ndarray biasa di atas buffer yang sama (indexing np.memmap lebih lambat)
+            arrays[name] = np.asarray(mapped)
+    return arrays
+
+
+def load_forest(path):
+    # Forest hasil export (app.export_forest): array memory-map + versi model sklearn asalnya
+    arrays = load_packed(path)
+    if int(arrays.get('format', 1)) != PACKED_FORMAT:
+        raise ValueError(f"{path}: format forest lama, jalankan `flask train` / `flask export-forest` ulang")
+    arrays['version'] = str(arrays['version'])
+    return arrays
+
+
+def forest_leaf_values(packed, X):
+    """Value daun tiap (tree, baris) -> array (n_tree, n_baris), tanpa sklearn.
+
+    Semua pasangan (baris, tree) turun satu level per iterasi lewat array 1D.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    n_rows, n_features = X.shape
+    feature, threshold, value = packed['feature'], packed['threshold'], packed['value']
+    left = packed['left']
+    roots = packed['roots']
+    depth = int(packed['depth'])
+    flat = X.reshape(-1)
+
+    # Urutan tree-major: (tree, baris), jadi sum(axis=0) menjumlah per tree berurutan
+    node = np.repeat(roots, n_rows)
+    offset = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, len(roots))
+    if np.isnan(flat).any():
+        # Jalur lebih lambat cuma kalau ada NaN: NaN > threshold = False, arahnya dari missing_right
+        missing_right = packed['missing_right']
+        for _ in range(depth):
+            values = flat[offset + feature[node]]
+            node = left[node] + ((values > threshold[node]) | (np.isnan(values) & missing_right[node]))
+    else:
+        for _ in range(depth):
+            node = left[node] + (flat[offset + feature[node]] > threshold[node])
+    return value[node].reshape(len(roots), n_rows)
+
+
+def predict_forest(packed, X):
+    """Prediksi forest tanpa sklearn (tanpa DataFrame / validasi input per panggilan).
+
+    Rata-rata dijumlah berurutan per tree seperti RandomForestRegressor.predict, jadi hasilnya
+    identik dengan sklearn.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    roots = packed['roots']
+    if len(X) == 1 and not np.isnan(X).any():
+        # Jalur 1 baris: tanpa offset baris
+        feature, threshold, left = packed['feature'], packed['threshold'], packed['left']
+        flat = X.reshape(-1)
+        node = roots
+        for _ in range(int(packed['depth'])):
+            node = left[node] + (flat[feature[node]] > threshold[node])
+        return _sum_trees(packed['value'][node][:, None]) / len(roots)
+    return _sum_trees(forest_leaf_values(packed, X)) / len(roots)
+
+
+def _sum_trees(values):
+    # Jumlah per tree berurutan seperti sklearn; untuk 1 baris numpy memakai pairwise sum,
+    # jadi dijumlah pakai float Python (urutan sama)
+    if values.shape[1] == 1:
+        total = 0.0
+        for leaf_value in values[:, 0].tolist():
+            total += leaf_value
+        return np.array([total])
+    return values.sum(axis=0)
+
+
+def decision_isolation_forest(packed, X):
+    # Sama dengan IsolationForest.decision_function: skor < 0 berarti anomali
+    depths = _sum_trees(forest_leaf_values(packed, X))
+    norm = float(packed['path_norm'])
+    scores = 2 ** -(depths / norm) if norm != 0 else np.ones(len(depths))
+    return -scores - packed['offset']